@@ -10,6 +10,8 @@ import yfinance as yf
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
+import atexit
+import threading
 
 # Importar componentes personalizados
 from data_handler import FIIDataHandler
@@ -22,13 +24,28 @@ from components.filters import create_filter_panel, create_portfolio_input_form,
 from components.modals import (create_fii_details_modal, create_fii_overview_content, 
                               create_fii_dividend_content, create_fii_analysis_content,
                               create_fii_advanced_content, create_fii_recommendation_content)
+from utils.schema import format_boolean, to_records
+from utils.screener import ScreenerQuery
 
 # Inicializar o app Dash com suppress_callback_exceptions=True
 app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
 app.title = "Dashboard de FIIs - Análise de Dividendos e Rentabilidade"
 
-# Inicializar o manipulador de dados
+# Os processos de extração de páginas (spawn/forkserver) reimportam este módulo como
+# __mp_main__ quando o app roda com "python app.py": só o processo do app inicia as threads
+BACKGROUND_TASKS = __name__ != '__mp_main__'
+
+# Inicializar o manipulador de dados e a atualização em segundo plano
 data_handler = FIIDataHandler()
+if BACKGROUND_TASKS:
+    data_handler.start_background_refresh()
+    atexit.register(data_handler.access_stats.flush)
+
+# Aquecimento: o app só se declara pronto depois de carregar dados e montar a visão geral
+WARMUP_TOP_N = 20
+warmup_done = threading.Event()
+warmup_error = None  # mensagem da última falha do aquecimento, exposta em /ready
+_warmup_lock = threading.Lock()
 
 # Layout principal do app
 app.layout = dbc.Container([
@@ -327,6 +344,7 @@ app.layout = dbc.Container([
     
     # Armazenamento de dados
     dcc.Store(id='all-fiis-data-store'),
+    dcc.Store(id='data-version-store'),  # versão da fotografia enviada em all-fiis-data-store
     dcc.Store(id='filtered-fiis-data-store'),
     dcc.Store(id='portfolio-data-store', data=[]),
     dcc.Store(id='selected-fii-data-store'),
@@ -348,24 +366,60 @@ app.layout = dbc.Container([
     dbc.Row([
         dbc.Col([
             html.Div(id="last-update-info", className="text-muted text-right mt-4"),
+            dcc.Interval(id="last-update-interval", interval=60 * 1000),
         ], width=12)
     ]),
     
 ], fluid=True)
 
+# Componentes derivados dos dados, reaproveitados enquanto a versão dos dados não mudar
+_components_cache = {}
+
+def get_cached_components(name, version, builder):
+    """Retorna os componentes construídos para a versão dos dados recebidos, construindo se necessário
+    
+    A versão é a dos dados que o builder usa (a do navegador, não a corrente no servidor):
+    senão uma atualização concluída no meio guardaria componentes antigos sob a versão nova.
+    """
+    cached = _components_cache.get(name)
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1]
+    
+    components = builder()
+    # Só guardar a versão corrente: um navegador com dados antigos não desaloja a atual
+    if version is not None and version == data_handler.data_version:
+        _components_cache[name] = (version, components)
+    return components
+
 # Callbacks
 
 # Carregar dados iniciais
 @app.callback(
     [Output('all-fiis-data-store', 'data'),
-     Output('last-update-info', 'children')],
+     Output('data-version-store', 'data')],
     [Input('_', 'children')],
     prevent_initial_call=False
 )
 def load_initial_data(_):
-    df = data_handler.fetch_data()
-    last_update = data_handler.last_update.strftime("%d/%m/%Y %H:%M:%S") if data_handler.last_update else "N/A"
-    return df.to_dict('records'), f"Última atualização: {last_update}"
+    df, version = data_handler.fetch_versioned()
+    return to_records(df), version
+
+# Exibir a idade da fotografia de dados em uso
+@app.callback(
+    Output('last-update-info', 'children'),
+    [Input('all-fiis-data-store', 'data'),
+     Input('last-update-interval', 'n_intervals')]
+)
+def update_last_update_info(_, __):
+    if data_handler.last_update is None:
+        return "Última atualização: N/A (dados de exemplo)"
+    
+    last_update = data_handler.last_update.strftime("%d/%m/%Y %H:%M:%S")
+    minutes = int(data_handler.snapshot_age().total_seconds() // 60)
+    age = f"há {minutes // 60}h{minutes % 60:02d}min" if minutes >= 60 else f"há {minutes} min"
+    if data_handler.last_refresh_ok is False:
+        return f"Última atualização: {last_update} ({age}; fonte indisponível, exibindo os últimos dados válidos)"
+    return f"Última atualização: {last_update} ({age})"
 
 # Inicializar componentes
 @app.callback(
@@ -382,14 +436,19 @@ def load_initial_data(_):
      Output('portfolio-input-container', 'children'),
      Output('dividend-calendar-container', 'children')],
     [Input('all-fiis-data-store', 'data')],
+    [State('data-version-store', 'data')],
     prevent_initial_call=True
 )
-def initialize_components(all_fiis_data):
+def initialize_components(all_fiis_data, data_version):
     if not all_fiis_data:
         return [html.Div("Carregando dados...") for _ in range(12)]
     
-    df = pd.DataFrame(all_fiis_data)
-    
+    # Reaproveitar gráficos e tabelas enquanto os dados de origem não mudarem
+    return get_cached_components('overview', data_version,
+                                 lambda: build_overview_components(pd.DataFrame(all_fiis_data)))
+
+def build_overview_components(df):
+    """Constrói filtros, tabelas e gráficos da visão geral a partir do universo de FIIs"""
     # Obter lista de segmentos únicos para o filtro
     segments = sorted(df['Segmento'].unique())
     
@@ -430,43 +489,94 @@ def initialize_components(all_fiis_data):
         calendar_table
     ]
 
+# Sliders dos dois painéis de filtros: (id, coluna, limite, valor inicial, ignorar no valor inicial).
+# Os do painel avançado (e os dois últimos do básico) começam no extremo, onde não devem filtrar nada
+RANGE_FILTERS = [
+    ('min-dy-filter', 'DY Anual', 'min', 0, False),
+    ('max-price-filter', 'Preço', 'max', 500, False),
+    ('max-pvp-filter', 'P/VP', 'max', 2, False),
+    ('min-liquidez-filter', 'Liquidez', 'min', 0, False),
+    ('max-vacancia-filter', 'Vacância', 'max', 30, True),
+    ('min-cap-rate-filter', 'Cap Rate', 'min', 0, True),
+    ('min-dy-annual-filter', 'DY Anual', 'min', 0, True),
+    ('min-tir-filter', 'TIR Estimada', 'min', 0, True),
+    ('max-pvp-adv-filter', 'P/VP', 'max', 2, True),
+    ('max-spread-pvp-filter', 'Spread P/VP', 'max', 30, True),
+    ('max-vacancia-adv-filter', 'Vacância', 'max', 30, True),
+    ('min-cap-rate-adv-filter', 'Cap Rate', 'min', 0, True),
+    ('min-sharpe-filter', 'Sharpe Ratio', 'min', -1, True),
+    ('min-liquidez-adv-filter', 'Liquidez', 'min', 0, True),
+]
+
+def build_screener_query(segment, ticker, values):
+    """Monta a consulta do screener a partir dos valores dos filtros (na ordem de RANGE_FILTERS)"""
+    query = ScreenerQuery()
+    if segment and segment != 'Todos':
+        query.equals('Segmento', segment)
+    query.contains('Ticker', ticker)
+    for (_, column, bound, initial, ignore_initial), value in zip(RANGE_FILTERS, values):
+        if value is None or (ignore_initial and value == initial):
+            continue
+        if bound == 'min':
+            query.at_least(column, value)
+        else:
+            query.at_most(column, value)
+    return query
+
 # Aplicar filtros
 @app.callback(
     Output('filtered-fiis-data-store', 'data'),
     [Input('apply-filters-button', 'n_clicks')],
-    [State('all-fiis-data-store', 'data'),
-     State('segment-filter', 'value'),
-     State('min-dy-filter', 'value'),
-     State('max-price-filter', 'value'),
-     State('max-pvp-filter', 'value'),
-     State('ticker-search', 'value'),
-     State('min-liquidez-filter', 'value')],
+    [State('segment-filter', 'value'),
+     State('ticker-search', 'value')] +
+    [State(filter_id, 'value') for filter_id, _, _, _, _ in RANGE_FILTERS],
     prevent_initial_call=True
 )
-def apply_filters(n_clicks, all_fiis_data, segment, min_dy, max_price, max_pvp, ticker, min_liquidez):
-    if not n_clicks or not all_fiis_data:
+def apply_filters(n_clicks, segment, ticker, *values):
+    # Os filtros rodam sobre a fotografia do servidor: não é preciso reenviar o universo do navegador
+    if not n_clicks:
         raise PreventUpdate
     
-    df = pd.DataFrame(all_fiis_data)
-    filtered_df = data_handler.filter_data(df, segment, min_dy, max_price, ticker, max_pvp, min_liquidez)
+    # Uma única avaliação sobre a fotografia corrente (ou as posições já guardadas para os mesmos filtros)
+    query = build_screener_query(segment, ticker, values)
+    filtered_df = data_handler.screen(query)
     
-    return filtered_df.to_dict('records')
+    return to_records(filtered_df)
+
+def ticker_suggestions(text):
+    """Opções do datalist de busca: ticker como valor e nome do fundo como rótulo"""
+    return [html.Option(value=item['Ticker'], label=item['Nome'] or item['Ticker'])
+            for item in data_handler.suggest_tickers(text)]
+
+# Sugestões enquanto se digita nos campos de ticker
+@app.callback(
+    Output('ticker-search-suggestions', 'children'),
+    [Input('ticker-search', 'value')],
+    prevent_initial_call=True
+)
+def suggest_search_tickers(text):
+    return ticker_suggestions(text)
+
+@app.callback(
+    Output('portfolio-ticker-suggestions', 'children'),
+    [Input('portfolio-ticker-input', 'value')],
+    prevent_initial_call=True
+)
+def suggest_portfolio_tickers(text):
+    return ticker_suggestions(text)
 
 # Limpar filtros
 @app.callback(
     [Output('segment-filter', 'value'),
-     Output('min-dy-filter', 'value'),
-     Output('max-price-filter', 'value'),
-     Output('max-pvp-filter', 'value'),
-     Output('ticker-search', 'value'),
-     Output('min-liquidez-filter', 'value')],
+     Output('ticker-search', 'value')] +
+    [Output(filter_id, 'value') for filter_id, _, _, _, _ in RANGE_FILTERS],
     [Input('clear-filters-button', 'n_clicks')],
     prevent_initial_call=True
 )
 def clear_filters(n_clicks):
     if not n_clicks:
         raise PreventUpdate
-    return 'Todos', 0, 500, 2, '', 0
+    return ['Todos', ''] + [initial for _, _, _, initial, _ in RANGE_FILTERS]
 
 # Atualizar tabelas com dados filtrados
 @app.callback(
@@ -497,14 +607,17 @@ def update_tables(filtered_data):
      Output('low-pvp-container', 'children'),
      Output('below-fair-price-container', 'children')],
     [Input('all-fiis-data-store', 'data')],
+    [State('data-version-store', 'data')],
     prevent_initial_call=True
 )
-def update_opportunity_alerts(all_fiis_data):
+def update_opportunity_alerts(all_fiis_data, data_version):
     if not all_fiis_data:
         return [html.Div("Carregando...") for _ in range(4)]
     
-    df = pd.DataFrame(all_fiis_data)
-    
+    return get_cached_components('alerts', data_version, lambda: build_opportunity_alerts(pd.DataFrame(all_fiis_data)))
+
+def build_opportunity_alerts(df):
+    """Constrói as listas de alertas de oportunidades"""
     # Melhores oportunidades (alto DY + baixo P/VP + alto Sharpe)
     df_copy = df.copy()
     df_copy.loc[:, 'Opportunity_Score'] = df_copy['DY Anual'] - (df_copy['P/VP'] * 2) + df_copy.get('Sharpe Ratio', 0) * 2
@@ -557,7 +670,6 @@ def update_opportunity_alerts(all_fiis_data):
     [Input('add-to-portfolio-button', 'n_clicks'),
      Input('modal-add-to-portfolio', 'n_clicks')],
     [State('portfolio-data-store', 'data'),
-     State('all-fiis-data-store', 'data'),
      State('portfolio-ticker-input', 'value'),
      State('portfolio-quantity-input', 'value'),
      State('portfolio-price-input', 'value'),
@@ -566,7 +678,7 @@ def update_opportunity_alerts(all_fiis_data):
      State('modal-price-input', 'value')],
     prevent_initial_call=True
 )
-def add_to_portfolio(n_clicks1, n_clicks2, portfolio_data, all_fiis_data, ticker, quantity, price, selected_fii, modal_quantity, modal_price):
+def add_to_portfolio(n_clicks1, n_clicks2, portfolio_data, ticker, quantity, price, selected_fii, modal_quantity, modal_price):
     ctx = dash.callback_context
     if not ctx.triggered:
         raise PreventUpdate
@@ -581,13 +693,12 @@ def add_to_portfolio(n_clicks1, n_clicks2, portfolio_data, all_fiis_data, ticker
         if not ticker or not quantity or not price:
             return portfolio_data
         
-        # Verificar se o ticker existe
-        df = pd.DataFrame(all_fiis_data)
-        if ticker not in df['Ticker'].values:
+        # Verificar se o ticker existe (índice da fotografia corrente, sem varrer os dados)
+        index = data_handler.ticker_index
+        fii_data = index.row(ticker) if index is not None else None
+        if fii_data is None:
             return portfolio_data
         
-        fii_data = df[df['Ticker'] == ticker].iloc[0].to_dict()
-        
     elif trigger_id == 'modal-add-to-portfolio':
         if not selected_fii or not modal_quantity or not modal_price:
             return portfolio_data
@@ -787,6 +898,8 @@ def export_data_to_csv(n_clicks, all_fiis_data):
         raise PreventUpdate
     
     df = pd.DataFrame(all_fiis_data)
+    if 'Oportunidade' in df.columns:
+        df['Oportunidade'] = format_boolean(df['Oportunidade'])
     return dcc.send_data_frame(df.to_csv, "fiis_data.csv", index=False)
 
 # Exportar portfólio para CSV
@@ -814,6 +927,7 @@ def load_historical_data(selected_fii):
         raise PreventUpdate
     
     ticker = selected_fii['Ticker']
+    data_handler.access_stats.record(ticker)
     history_data = data_handler.get_advanced_indicators(ticker)
     
     if history_data is None:
@@ -875,7 +989,7 @@ def update_fii_details_content(selected_fii, history_data, all_fiis_data):
     
     overview_content = create_fii_overview_content(selected_fii)
     dividend_content = create_fii_dividend_content(selected_fii['Ticker'], history_df)
-    analysis_content = create_fii_analysis_content(selected_fii, all_fiis_df)
+    analysis_content = create_fii_analysis_content(selected_fii, all_fiis_df, data_handler.ticker_index)
     advanced_content = create_fii_advanced_content(selected_fii, all_fiis_df, history_df)
     recommendation_content = create_fii_recommendation_content(selected_fii)
     
@@ -1126,6 +1240,51 @@ def update_upcoming_events(all_fiis_data):
     
     return events_table
 
+# Aquecimento do cache na inicialização ou sob demanda
+def warm_up():
+    """Pré-carrega universo e histórico dos mais vistos e monta os componentes da visão geral"""
+    global warmup_error
+    if not _warmup_lock.acquire(blocking=False):
+        return
+    try:
+        start = datetime.now()
+        tickers = data_handler.warm_up(top_n=WARMUP_TOP_N)
+        # Mesmo formato que os callbacks recebem do dcc.Store (sem categorias nem tipos do esquema)
+        data, version = data_handler.fetch_versioned()
+        df = pd.DataFrame(to_records(data))
+        get_cached_components('overview', version, lambda: build_overview_components(df))
+        get_cached_components('alerts', version, lambda: build_opportunity_alerts(df))
+        data_handler.access_stats.flush()
+        warmup_error = None
+        print(f"Aquecimento concluído em {(datetime.now() - start).total_seconds():.1f}s ({len(tickers)} tickers)")
+    except Exception as e:
+        warmup_error = str(e)
+        print(f"Erro no aquecimento: {e}")
+    finally:
+        # Mesmo com falha o app passa a responder (as requisições montam o que faltar), mas /ready acusa a falha
+        warmup_done.set()
+        _warmup_lock.release()
+
+@app.server.route('/ready')
+def ready():
+    if warmup_done.is_set():
+        if warmup_error is not None:
+            return {'status': 'warm-up failed', 'error': warmup_error}, 503
+        return {'status': 'ready', 'data_version': data_handler.data_version}, 200
+    return {'status': 'warming up'}, 503
+
+@app.server.route('/screen-stats')
+def screen_stats():
+    return data_handler.screen_stats(), 200
+
+@app.server.route('/warmup', methods=['POST'])
+def trigger_warm_up():
+    threading.Thread(target=warm_up, name='fii-warmup', daemon=True).start()
+    return {'status': 'started'}, 202
+
+if BACKGROUND_TASKS:
+    threading.Thread(target=warm_up, name='fii-warmup', daemon=True).start()
+
 # Executar o app
 if __name__ == '__main__':
     app.run_server(debug=True)
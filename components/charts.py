@@ -4,12 +4,14 @@ from dash import dcc
 import pandas as pd
 import numpy as np
 
+from utils.universe import TickerIndex
+
 def create_sector_distribution_chart(df):
     """Cria gráfico de distribuição por setor com dividend yield médio"""
     if df is None or df.empty:
         return dcc.Graph(figure=go.Figure())
     
-    sector_data = df.groupby('Segmento').agg({
+    sector_data = df.groupby('Segmento', observed=True).agg({
         'Ticker': 'count',
         'DY Anual': 'mean'
     }).reset_index()
@@ -194,15 +196,17 @@ def create_dividend_history_chart(ticker, history_data=None):
     
     return dcc.Graph(figure=fig, id='dividend-history-chart')
 
-def create_advanced_analysis_chart(df, ticker):
+def create_advanced_analysis_chart(df, ticker, index=None):
     """Cria gráfico de análise avançada para um FII específico"""
     if df is None or df.empty:
         return dcc.Graph(figure=go.Figure())
     
-    # Selecionar dados do FII específico
-    fii_data = df[df['Ticker'] == ticker]
+    # Selecionar dados do FII específico pelo índice de tickers (sem varrer o DataFrame)
+    if index is None or ticker not in index:
+        index = TickerIndex(df)
+    fii_data = index.row(ticker)
     
-    if fii_data.empty:
+    if fii_data is None:
         return dcc.Graph(figure=go.Figure())
     
     # Criar gráfico de radar para análise multidimensional
@@ -211,8 +215,8 @@ def create_advanced_analysis_chart(df, ticker):
     # Normalizar valores para escala de 0 a 10
     values = []
     for cat in categories:
-        if cat in fii_data.columns:
-            val = fii_data[cat].values[0]
+        if cat in fii_data:
+            val = fii_data[cat]
             
             # Normalização específica para cada indicador
             if cat == 'DY Anual':
@@ -248,7 +252,7 @@ def create_advanced_analysis_chart(df, ticker):
     ))
     
     # Adicionar média do setor para comparação
-    segment = fii_data['Segmento'].values[0]
+    segment = fii_data['Segmento']
     segment_fiis = df[df['Segmento'] == segment]
     
     segment_values = []
@@ -399,7 +403,7 @@ def create_yield_curve_chart(df):
         return dcc.Graph(figure=go.Figure())
     
     # Agrupar por segmento e calcular estatísticas
-    segment_stats = df.groupby('Segmento').agg({
+    segment_stats = df.groupby('Segmento', observed=True).agg({
         'DY Anual': ['mean', 'min', 'max', 'std'],
         'P/VP': 'mean',
         'Ticker': 'count'
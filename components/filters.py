@@ -67,7 +67,10 @@ def create_filter_panel(segments):
                         id='ticker-search',
                         type="text",
                         placeholder="Ex: KNRI11",
+                        list='ticker-search-suggestions',
+                        autocomplete="off",
                     ),
+                    html.Datalist(id='ticker-search-suggestions'),
                 ], width=3),
                 
                 dbc.Col([
@@ -139,7 +142,9 @@ def create_portfolio_input_form():
             dbc.Row([
                 dbc.Col([
                     html.Label("Ticker:"),
-                    dbc.Input(id="portfolio-ticker-input", placeholder="Ex: KNRI11", type="text"),
+                    dbc.Input(id="portfolio-ticker-input", placeholder="Ex: KNRI11", type="text",
+                              list="portfolio-ticker-suggestions", autocomplete="off"),
+                    html.Datalist(id="portfolio-ticker-suggestions"),
                 ], width=3),
                 
                                 dbc.Col([
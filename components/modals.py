@@ -3,6 +3,8 @@ import dash_bootstrap_components as dbc
 import plotly.express as px
 import pandas as pd
 
+from utils.universe import TickerIndex
+
 def create_fii_details_modal():
     """Cria o modal de detalhes do FII"""
     modal = dbc.Modal(
@@ -170,15 +172,23 @@ def create_fii_dividend_content(ticker, history_data=None):
     
     return content
 
-def create_fii_analysis_content(fii_data, all_fiis_df):
-    """Cria o conteúdo da aba de análise do FII"""
+def create_fii_analysis_content(fii_data, all_fiis_df, index=None):
+    """Cria o conteúdo da aba de análise do FII
+    
+    `index` é o TickerIndex da fotografia corrente; sem ele (ou se o ticker não
+    estiver nela), um índice é montado a partir de all_fiis_df.
+    """
     if fii_data is None or all_fiis_df is None or all_fiis_df.empty:
         return html.Div("Dados não disponíveis para análise")
     
     from components.charts import create_advanced_analysis_chart
     
+    ticker = fii_data['Ticker']
+    if index is None or ticker not in index:
+        index = TickerIndex(all_fiis_df)
+    
     # Criar gráfico de análise avançada
-    analysis_chart = create_advanced_analysis_chart(all_fiis_df, fii_data['Ticker'])
+    analysis_chart = create_advanced_analysis_chart(all_fiis_df, ticker, index)
     
     # Encontrar FIIs do mesmo segmento para comparação
     segment = fii_data.get('Segmento', '')
@@ -228,28 +238,28 @@ def create_fii_analysis_content(fii_data, all_fiis_df):
         dbc.Row([
             dbc.Col([
                 html.H5("Dividend Yield"),
-                html.P(f"Posição: {all_fiis_df['DY Anual'].rank(ascending=False)[all_fiis_df['Ticker'] == fii_data['Ticker']].values[0]:.0f}º de {len(all_fiis_df)} FIIs"),
-                html.P(f"Percentil: {100 - (all_fiis_df['DY Anual'].rank(ascending=False, pct=True)[all_fiis_df['Ticker'] == fii_data['Ticker']].values[0] * 100):.1f}%"),
+                html.P(f"Posição: {index.rank(ticker, 'DY Anual', ascending=False):.0f}º de {len(index)} FIIs"),
+                html.P(f"Percentil: {100 - (index.rank(ticker, 'DY Anual', ascending=False, pct=True) * 100):.1f}%"),
             ], width=6),
             
             dbc.Col([
                 html.H5("P/VP"),
-                html.P(f"Posição: {all_fiis_df['P/VP'].rank()[all_fiis_df['Ticker'] == fii_data['Ticker']].values[0]:.0f}º de {len(all_fiis_df)} FIIs"),
-                html.P(f"Percentil: {(all_fiis_df['P/VP'].rank(pct=True)[all_fiis_df['Ticker'] == fii_data['Ticker']].values[0] * 100):.1f}%"),
+                html.P(f"Posição: {index.rank(ticker, 'P/VP'):.0f}º de {len(index)} FIIs"),
+                html.P(f"Percentil: {(index.rank(ticker, 'P/VP', pct=True) * 100):.1f}%"),
             ], width=6),
         ]),
         
                 dbc.Row([
             dbc.Col([
                 html.H5("Cap Rate"),
-                html.P(f"Posição: {all_fiis_df['Cap Rate'].rank(ascending=False)[all_fiis_df['Ticker'] == fii_data['Ticker']].values[0]:.0f}º de {len(all_fiis_df)} FIIs"),
-                html.P(f"Percentil: {100 - (all_fiis_df['Cap Rate'].rank(ascending=False, pct=True)[all_fiis_df['Ticker'] == fii_data['Ticker']].values[0] * 100):.1f}%"),
+                html.P(f"Posição: {index.rank(ticker, 'Cap Rate', ascending=False):.0f}º de {len(index)} FIIs"),
+                html.P(f"Percentil: {100 - (index.rank(ticker, 'Cap Rate', ascending=False, pct=True) * 100):.1f}%"),
             ], width=6),
             
             dbc.Col([
                 html.H5("Vacância"),
-                html.P(f"Posição: {all_fiis_df['Vacância'].rank()[all_fiis_df['Ticker'] == fii_data['Ticker']].values[0]:.0f}º de {len(all_fiis_df)} FIIs"),
-                html.P(f"Percentil: {(all_fiis_df['Vacância'].rank(pct=True)[all_fiis_df['Ticker'] == fii_data['Ticker']].values[0] * 100):.1f}%"),
+                html.P(f"Posição: {index.rank(ticker, 'Vacância'):.0f}º de {len(index)} FIIs"),
+                html.P(f"Percentil: {(index.rank(ticker, 'Vacância', pct=True) * 100):.1f}%"),
             ], width=6),
         ]),
         
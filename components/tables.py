@@ -2,6 +2,8 @@ import dash_bootstrap_components as dbc
 from dash import dash_table, html
 import pandas as pd
 
+from utils.schema import format_boolean
+
 def create_main_table(df, id_prefix='main'):
     """Cria a tabela principal de FIIs"""
     if df is None or df.empty:
@@ -24,6 +26,8 @@ def create_main_table(df, id_prefix='main'):
         df_display['Sharpe Ratio'] = df_display['Sharpe Ratio'].map('{:.2f}'.format)
     if 'TIR Estimada' in df_display.columns:
         df_display['TIR Estimada'] = df_display['TIR Estimada'].map('{:.2f}%'.format)
+    if 'Oportunidade' in df_display.columns:
+        df_display['Oportunidade'] = format_boolean(df_display['Oportunidade'])
     
     # Definir colunas a exibir
     columns = [
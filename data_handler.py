@@ -5,76 +5,346 @@ import yfinance as yf
 import json
 from datetime import datetime, timedelta
 import numpy as np
+import os
+import threading
+
+from utils.access_stats import AccessStats
+from utils.api_client import APIClient
+from utils.filter_engine import FilterEngine
+from utils.history import PriceHistoryStore
+from utils.indicators import IndicatorEngine
+from utils.ingestion import StatusInvestIngester
+from utils.memory_cache import MemoryCache
+from utils.schema import apply_schema
+from utils.screener import ScreenerQuery
+from utils.search import SearchIndex
+from utils.synthetic import generate_universe
+from utils.universe import TickerIndex
+
+class UniverseSnapshot:
+    """Fotografia imutável do universo de FIIs já processado (só a data é renovada, via renew)"""
+    
+    def __init__(self, data, updated_at, version=None, is_sample=False):
+        self.data = data
+        self.updated_at = updated_at
+        self.version = version  # fingerprint do conteúdo bruto que originou os dados
+        self.is_sample = is_sample  # True quando os dados vêm de get_sample_data
+        self._index = None
+        self._filter_engine = None
+        self._search_index = None
+    
+    @property
+    def filter_engine(self):
+        """FilterEngine dos dados, montado no primeiro uso"""
+        if self._filter_engine is None:
+            self._filter_engine = FilterEngine(self.data, search=self.search_index)
+        return self._filter_engine
+    
+    @property
+    def search_index(self):
+        """SearchIndex de tickers e nomes; como a fotografia é trocada a cada atualização, é refeito junto"""
+        if self._search_index is None:
+            data = self.data
+            self._search_index = SearchIndex(data['Ticker'],
+                                             data['Nome'] if 'Nome' in data.columns else None,
+                                             data['Liquidez'] if 'Liquidez' in data.columns else None)
+        return self._search_index
+    
+    @property
+    def index(self):
+        """TickerIndex dos dados, montado no primeiro uso e válido enquanto a fotografia existir"""
+        if self._index is None:
+            self._index = TickerIndex(self.data)
+        return self._index
+    
+    def renew(self, updated_at):
+        """Renova a data de uma fotografia cujo conteúdo não mudou, mantendo índices e caches derivados dela"""
+        self.updated_at = updated_at
+        return self
+    
+    def age(self):
+        """Retorna há quanto tempo a fotografia foi gerada"""
+        return datetime.now() - self.updated_at
 
 class FIIDataHandler:
-    def __init__(self):
-        self.data = None
-        self.last_update = None
+    def __init__(self, api_client=None):
         self.update_interval = 4  # horas
+        self.retry_interval = 5  # minutos até nova tentativa após falha
+        self.api_client = api_client if api_client is not None else APIClient()
+        self.page_size = 100  # registros por página da busca avançada
+        self.max_workers = 4  # páginas buscadas em paralelo
+        self.snapshot_file = os.path.join(self.api_client.cache_dir, 'universe_snapshot.pkl')
+        self.history = PriceHistoryStore()
+        self.indicators = IndicatorEngine()  # colunas derivadas, com dependências e tempos por indicador
+        self.sample_seed = None  # semente dos dados de exemplo (None = aleatória)
+        # Posições resultantes de cada screen, por (fotografia, filtros normalizados), compartilhadas entre sessões
+        self.screen_cache = MemoryCache(max_entries=256)
+        self._advanced_lock = threading.Lock()
+        self._advanced_panel = None  # (fotografia, carga do histórico, períodos, painel) de get_advanced_indicators_batch
+        # Visualizações por ticker, persistidas para o aquecimento da próxima execução
+        self.access_stats = AccessStats(os.path.join(self.api_client.cache_dir, 'access_stats.json'))
+        
+        # A fotografia corrente é trocada de uma vez só; leitores nunca veem dados pela metade
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._refresher = None
+        self._stop_event = threading.Event()
+        self.last_refresh_ok = None  # resultado da última tentativa de atualização
+        self._last_attempt = None
+    
+    @property
+    def data(self):
+        snapshot = self._snapshot
+        return snapshot.data if snapshot is not None else None
+    
+    @property
+    def last_update(self):
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.is_sample:
+            return None
+        return snapshot.updated_at
+    
+    @property
+    def data_version(self):
+        """Versão (fingerprint) da fotografia corrente, usada para invalidar derivados"""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+    
+    @property
+    def ticker_index(self):
+        """Índice por ticker da fotografia corrente (None antes da primeira carga)"""
+        snapshot = self._snapshot
+        return snapshot.index if snapshot is not None else None
+    
+    def snapshot_age(self):
+        """Retorna a idade da fotografia corrente ou None se ainda não houver dados reais"""
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.is_sample:
+            return None
+        return snapshot.age()
         
     def should_update(self):
-        if self.last_update is None:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return True
+        # Após uma falha, aguardar retry_interval antes de tentar novamente
+        if self.last_refresh_ok is False and datetime.now() - self._last_attempt < timedelta(minutes=self.retry_interval):
+            return False
+        if snapshot.is_sample:
             return True
-        elapsed = datetime.now() - self.last_update
-        return elapsed > timedelta(hours=self.update_interval)
+        return snapshot.age() > timedelta(hours=self.update_interval)
     
     def fetch_data(self):
-        """Busca dados de FIIs de fontes externas"""
-        if not self.should_update() and self.data is not None:
-            return self.data
-            
-        # Aqui você pode implementar a coleta de dados de diferentes fontes
-        # Exemplo: web scraping de sites como Funds Explorer, Status Invest, etc.
+        """Retorna imediatamente a última fotografia completa, agendando atualização se expirada"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Primeira carga: não há o que servir, então a busca é feita aqui mesmo
+            return self.refresh().data
         
-        # Método simplificado para demonstração - em produção, use APIs reais
-        try:
-            # Exemplo usando Status Invest (você precisará adaptar conforme a estrutura do site)
-            url = "https://statusinvest.com.br/category/advancedsearchresult?search=%7B%22Segment%22%3A%22%22%2C%22CategoryType%22%3A%22%22%2C%22Search%22%3A%22%22%2C%22Order%22%3A%7B%22Field%22%3A%22name%22%2C%22Ascending%22%3Atrue%7D%2C%22Pagination%22%3A%7B%22Page%22%3A1%2C%22PageSize%22%3A200%7D%7D&CategoryType=2"
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            }
-            response = requests.post(url, headers=headers)
-            data = response.json()
+        if self.should_update():
+            self.refresh_async()
+        return snapshot.data
+    
+    def fetch_versioned(self):
+        """Como fetch_data, mas retorna (dados, versão) da mesma fotografia; versão None se ela foi trocada no meio"""
+        data = self.fetch_data()
+        snapshot = self._snapshot
+        return data, (snapshot.version if snapshot is not None and snapshot.data is data else None)
+    
+    def refresh(self, force=False):
+        """Reconstrói o universo e troca a fotografia corrente de forma atômica"""
+        with self._refresh_lock:
+            # Outra thread pode ter concluído a atualização enquanto esperávamos o lock
+            if not force and not self.should_update():
+                return self._snapshot
             
-            # Verificar se data contém a chave 'list' antes de acessá-la
-            if isinstance(data, dict) and 'list' in data:
-                # Converter para DataFrame
-                df = pd.DataFrame(data['list'])
+            # Entre processos, só um worker busca por vez; os demais adotam a fotografia que ele gravar
+            with self.api_client.key_lock('universe', 'refresh'):
+                shared = self._adopt_shared_snapshot()
+                if shared is not None:
+                    return shared
                 
-                # Adicionar informações adicionais como P/VP, vacância, etc.
-                # Isso normalmente exigiria chamadas adicionais para cada FII
+                current = self._snapshot
+                previous_version = current.version if current is not None and not current.is_sample else None
+                data, version = self._fetch_universe(previous_version)
+                self.last_refresh_ok = version is not None
+                self._last_attempt = datetime.now()
                 
-                self.data = self.process_data(df)
-                self.last_update = datetime.now()
-                return self.data
+                if data is not None:
+                    self._snapshot = UniverseSnapshot(data, datetime.now(), version)
+                    self._save_snapshot(self._snapshot)
+                    # Histórico de preços de todo o universo, baixado em lote fora do caminho da requisição
+                    self.history.load_async(data['Ticker'].tolist())
+                elif version is not None:
+                    # Conteúdo idêntico ao anterior: só renovar a data da mesma fotografia, sem reprocessar nada
+                    self._snapshot = current.renew(datetime.now())
+                    self._save_snapshot(self._snapshot)
+                elif current is None or current.is_sample:
+                    # API indisponível: servir a última fotografia real gravada em disco, se houver
+                    last_good = self._load_last_good_snapshot()
+                    if last_good is not None:
+                        self._snapshot = last_good
+                        self.history.load_async(last_good.data['Ticker'].tolist())
+                    elif current is None:
+                        # Sem nenhum dado real ainda: usar dados de exemplo, sinalizados como tal
+                        self._snapshot = UniverseSnapshot(self.get_sample_data(), datetime.now(),
+                                                          version=f"sample-{datetime.now():%Y%m%d%H%M%S}", is_sample=True)
+                return self._snapshot
+    
+    def _adopt_shared_snapshot(self):
+        """Adota a fotografia gravada por outro worker se for mais nova que a corrente e ainda estiver no prazo"""
+        shared = self._load_last_good_snapshot()
+        if shared is None or shared.age() > timedelta(hours=self.update_interval):
+            return None
+        
+        current = self._snapshot
+        if current is not None and not current.is_sample and shared.updated_at <= current.updated_at:
+            return None
+        
+        self.last_refresh_ok = True
+        self._last_attempt = datetime.now()
+        if current is not None and not current.is_sample and current.version == shared.version:
+            # Outro worker só confirmou o mesmo conteúdo: manter a fotografia e o que já foi montado sobre ela
+            return current.renew(shared.updated_at)
+        self._snapshot = shared
+        self.history.load_async(shared.data['Ticker'].tolist())
+        return shared
+    
+    def update_prices(self, prices):
+        """Aplica novos preços ({ticker: preço}) e recalcula só os indicadores que dependem do preço
+        
+        Gera uma nova fotografia (com nova versão, invalidando os derivados em cache)
+        e retorna a lista de colunas recalculadas.
+        """
+        with self._refresh_lock:
+            current = self._snapshot
+            if current is None or not prices:
+                return []
+            
+            df = current.data
+            new_prices = df['Ticker'].astype(object).map(prices)
+            changed = new_prices.notna()
+            if not changed.any():
+                return []
+            
+            df = df.assign(**{'Preço': new_prices.where(changed, df['Preço'])})
+            df, recomputed = self.indicators.update(df, ['Preço'])
+            version = f"{current.version}@{datetime.now():%Y%m%d%H%M%S%f}"
+            self._snapshot = UniverseSnapshot(apply_schema(df), datetime.now(), version, current.is_sample)
+            if not current.is_sample:
+                self._save_snapshot(self._snapshot)
+            return recomputed
+    
+    def refresh_async(self):
+        """Dispara uma atualização em segundo plano, se nenhuma estiver em andamento"""
+        if self._refresh_lock.locked():
+            return
+        threading.Thread(target=self.refresh, name='fii-refresh-once', daemon=True).start()
+    
+    def start_background_refresh(self):
+        """Inicia a thread que reconstrói o universo periodicamente"""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop_event.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name='fii-refresh', daemon=True)
+        self._refresher.start()
+    
+    def stop_background_refresh(self):
+        """Interrompe a thread de atualização periódica"""
+        self._stop_event.set()
+    
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh(force=True)
+            except Exception as e:
+                print(f"Erro na atualização em segundo plano: {e}")
+                self.last_refresh_ok = False
+                self._last_attempt = datetime.now()
+            
+            if not self.last_refresh_ok:
+                wait = self.retry_interval * 60
             else:
-                print(f"Formato de dados inesperado: {type(data)}")
-                return self.get_sample_data()
+                wait = self.update_interval * 3600
+            self._stop_event.wait(wait)
+    
+    def _save_snapshot(self, snapshot):
+        """Grava a fotografia para os demais workers e como fallback se a API ficar indisponível"""
+        stored = {'data': snapshot.data, 'updated_at': snapshot.updated_at, 'version': snapshot.version}
+        try:
+            if self.api_client.shared_store is not None:
+                self.api_client.shared_store.save('universe', 'snapshot', stored)
+                return
+            temp_file = f"{self.snapshot_file}.{os.getpid()}.tmp"
+            pd.to_pickle(stored, temp_file)
+            os.replace(temp_file, self.snapshot_file)
+        except Exception as e:
+            print(f"Erro ao gravar fotografia dos dados: {e}")
+    
+    def _load_last_good_snapshot(self):
+        """Carrega a última fotografia real gravada; retorna None se não houver"""
+        store = self.api_client.shared_store
+        try:
+            if store is not None:
+                if not store.exists('universe', 'snapshot'):
+                    return None
+                stored = store.load('universe', 'snapshot')
+            elif os.path.exists(self.snapshot_file):
+                stored = pd.read_pickle(self.snapshot_file)
+            else:
+                return None
+            return UniverseSnapshot(apply_schema(stored['data']), stored['updated_at'], stored['version'])
+        except Exception as e:
+            print(f"Erro ao carregar fotografia dos dados: {e}")
+            return None
+    
+    def _fetch_universe(self, previous_version=None):
+        """Busca dados de FIIs de fontes externas
+        
+        Retorna (dados, versão). Se o conteúdo for idêntico a previous_version, dados
+        é None e a versão é mantida; se a busca falhar, ambos são None.
+        """
+        # Aqui você pode implementar a coleta de dados de diferentes fontes
+        # Exemplo: web scraping de sites como Funds Explorer, Status Invest, etc.
+        try:
+            # Busca paginada e paralela do Status Invest, montando o DataFrame página a página
+            ingester = StatusInvestIngester(self.api_client, category_type=2, page_size=self.page_size,
+                                            max_workers=self.max_workers)
+            df = ingester.ingest(previous_fingerprint=previous_version)
+            
+            if df is None:
+                return None, ingester.fingerprint
+            
+            if df.empty:
+                print("Nenhum FII retornado pela API")
+                return None, None
+            
+            # Adicionar informações adicionais como P/VP, vacância, etc.
+            # Isso normalmente exigiria chamadas adicionais para cada FII
+            
+            return self.process_data(df), ingester.fingerprint
             
         except Exception as e:
             print(f"Erro ao buscar dados: {e}")
-            # Fallback para dados de exemplo caso a API falhe
-            return self.get_sample_data()
+            return None, None
     
     def process_data(self, df):
         """Processa os dados brutos e calcula indicadores adicionais"""
         # Renomear colunas e calcular indicadores
         df = df.rename(columns={
             'ticker': 'Ticker',
+            'companyname': 'Nome',
+            'lastdividend': 'Último Dividendo',
             'price': 'Preço',
             'dy12m': 'DY Anual',
             'pvp': 'P/VP',
+            'valorpatrimonialcota': 'VPA',
             'segment': 'Segmento'
         })
         
-        # Calcular DY mensal (média)
-        df.loc[:, 'DY Mensal'] = df['DY Anual'] / 12
-        
-        # Calcular preço justo (exemplo simplificado)
-        df.loc[:, 'Preço Justo'] = df['Preço'] / df['P/VP']
-        
-        # Indicador de oportunidade (exemplo simples)
-        df.loc[:, 'Oportunidade'] = ((df['DY Anual'] > 8) & (df['P/VP'] < 1)).map({True: 'Sim', False: 'Não'})
+        if 'Último Dividendo' not in df.columns:
+            # Sem o último provento na fonte: estimar pelo DY mensal
+            df.loc[:, 'Último Dividendo'] = df['Preço'] * df['DY Anual'] / 100 / 12
         
         # Adicionar indicadores avançados
         df.loc[:, 'Cap Rate'] = np.random.uniform(5, 12, len(df))  # Simulado - em produção, use dados reais
@@ -82,73 +352,94 @@ class FIIDataHandler:
         df.loc[:, 'Liquidez'] = np.random.uniform(100000, 5000000, len(df))  # Volume médio diário em R$
         df.loc[:, 'Taxa de Administração'] = np.random.uniform(0.5, 2, len(df))
         
-        # Calcular Spread do P/VP (simulado - em produção, use média histórica real)
+        # Média histórica do P/VP, volatilidade e prêmio da TIR (simulados - em produção, use dados reais)
         df.loc[:, 'P/VP Médio Histórico'] = df['P/VP'] * np.random.uniform(0.8, 1.2, len(df))
-        df.loc[:, 'Spread P/VP'] = ((df['P/VP'] / df['P/VP Médio Histórico']) - 1) * 100
-        
-        # Calcular Índice de Sharpe adaptado (simulado)
         df.loc[:, 'Volatilidade'] = np.random.uniform(10, 30, len(df))  # % anual
-        df.loc[:, 'Sharpe Ratio'] = (df['DY Anual'] - 4.5) / df['Volatilidade']  # 4.5% como taxa livre de risco
+        df.loc[:, 'Prêmio TIR'] = np.random.uniform(-2, 8, len(df))
         
-        # Calcular TIR estimada (simulado)
-        df.loc[:, 'TIR Estimada'] = df['DY Anual'] + np.random.uniform(-2, 8, len(df))
+        # Indicadores derivados (P/VP e DY a partir do VPA e dos proventos, Preço Justo, Oportunidade, Spread P/VP, Sharpe, TIR)
+        df = self.indicators.compute(df)
         
-        return df
+        return apply_schema(df)
     
     def get_sample_data(self):
         """Retorna dados de exemplo caso a API falhe"""
-        # Criar dados fictícios para demonstração
-        segments = ['Logística', 'Corporativo', 'Recebíveis', 'Shopping', 'Híbrido', 'Residencial', 'Hospital']
-        tickers = [f"FII{i+1:02d}11" for i in range(150)]
-        
-        data = {
-            'Ticker': tickers,
-            'Segmento': np.random.choice(segments, size=150),
-            'Preço': np.random.uniform(10, 200, 150),
-            'DY Anual': np.random.uniform(4, 15, 150),
-            'P/VP': np.random.uniform(0.6, 1.4, 150),
-            'Último Dividendo': np.random.uniform(0.3, 2, 150),
-            'Vacância': np.random.uniform(0, 20, 150),
-            'Cap Rate': np.random.uniform(5, 12, 150),
-            'Liquidez': np.random.uniform(100000, 5000000, 150),
-            'Taxa de Administração': np.random.uniform(0.5, 2, 150),
-            'Volatilidade': np.random.uniform(10, 30, 150),
-        }
-        
-        df = pd.DataFrame(data)
-        df.loc[:, 'DY Mensal'] = df['DY Anual'] / 12
-        df.loc[:, 'Preço Justo'] = df['Preço'] / df['P/VP'] * np.random.uniform(0.9, 1.1, 150)
-        df.loc[:, 'Oportunidade'] = ((df['DY Anual'] > 8) & (df['P/VP'] < 1)).map({True: 'Sim', False: 'Não'})
-        df.loc[:, 'P/VP Médio Histórico'] = df['P/VP'] * np.random.uniform(0.8, 1.2, 150)
-        df.loc[:, 'Spread P/VP'] = ((df['P/VP'] / df['P/VP Médio Histórico']) - 1) * 100
-        df.loc[:, 'Sharpe Ratio'] = (df['DY Anual'] - 4.5) / df['Volatilidade']
-        df.loc[:, 'TIR Estimada'] = df['DY Anual'] + np.random.uniform(-2, 8, 150)
-        
-        return df
+        # Universo sintético com o mesmo esquema dos dados reais (sample_seed fixa torna-o reprodutível)
+        return generate_universe(150, seed=self.sample_seed, engine=self.indicators)
     
     def filter_data(self, df, segment=None, min_dy=None, max_price=None, ticker=None, max_pvp=None, min_liquidez=None):
         """Aplica filtros aos dados"""
-        filtered_df = df.copy()
-        
+        query = ScreenerQuery()
         if segment and segment != 'Todos':
-            filtered_df = filtered_df[filtered_df['Segmento'] == segment]
-            
-        if min_dy is not None:
-            filtered_df = filtered_df[filtered_df['DY Anual'] >= min_dy]
-            
-        if max_price is not None:
-            filtered_df = filtered_df[filtered_df['Preço'] <= max_price]
-            
-        if ticker:
-            filtered_df = filtered_df[filtered_df['Ticker'].str.contains(ticker, case=False)]
-            
-        if max_pvp is not None:
-            filtered_df = filtered_df[filtered_df['P/VP'] <= max_pvp]
-            
-        if min_liquidez is not None:
-            filtered_df = filtered_df[filtered_df['Liquidez'] >= min_liquidez]
-            
-        return filtered_df
+            query.equals('Segmento', segment)
+        query.at_least('DY Anual', min_dy)
+        query.at_most('Preço', max_price)
+        query.contains('Ticker', ticker)
+        query.at_most('P/VP', max_pvp)
+        query.at_least('Liquidez', min_liquidez)
+        return self.screen(query, df)
+    
+    def screen(self, query, df=None):
+        """Avalia uma ScreenerQuery de uma só vez e retorna as linhas aceitas
+        
+        Sobre a fotografia corrente (df None ou os próprios dados dela) usa o
+        FilterEngine da fotografia, com as colunas já ordenadas; para outro
+        DataFrame monta um motor só para esta consulta.
+        """
+        snapshot = self._snapshot
+        if df is None:
+            df = self.fetch_data()
+            snapshot = self._snapshot
+        if snapshot is None or df is not snapshot.data:
+            return query.run(FilterEngine(df))
+        
+        # Mesma fotografia e mesmos filtros normalizados: reaproveitar as posições já calculadas
+        # A versão basta: recargas idênticas mantêm a fotografia e cada mudança de preço gera versão nova
+        key = (snapshot.version, query.key())
+        positions = self.screen_cache.get(key)
+        if positions is None:
+            positions = query.positions(snapshot.filter_engine)
+            positions.setflags(write=False)
+            self.screen_cache.set(key, positions)
+        return df.take(positions)
+    
+    def screen_stats(self):
+        """Contadores do cache de resultados do screener (acertos, faltas, descartes, taxa de acerto)"""
+        return self.screen_cache.stats()
+    
+    def suggest_tickers(self, text, limit=10):
+        """Sugestões de busca enquanto se digita: [{'Ticker', 'Nome'}], dos mais líquidos aos menos"""
+        snapshot = self._snapshot
+        if snapshot is None or not text:
+            return []
+        search = snapshot.search_index
+        return [{'Ticker': search.tickers[position], 'Nome': search.names[position]}
+                for position in search.suggest(text, limit)]
+    
+    def warm_up(self, top_n=20):
+        """Pré-carrega o universo e os indicadores avançados dos tickers mais vistos; retorna esses tickers
+        
+        Os tickers vêm das estatísticas de acesso da execução anterior; sem estatísticas
+        suficientes, a lista é completada com os FIIs de maior liquidez.
+        """
+        df = self.fetch_data()
+        universe = set(df['Ticker'])
+        
+        tickers = [ticker for ticker in self.access_stats.top(top_n) if ticker in universe]
+        if len(tickers) < top_n and 'Liquidez' in df.columns:
+            by_liquidity = df.sort_values('Liquidez', ascending=False)['Ticker']
+            tickers += [ticker for ticker in by_liquidity if ticker not in tickers][:top_n - len(tickers)]
+        
+        # Histórico real dos mais vistos já em memória, sem esperar a carga do universo inteiro
+        missing = [ticker for ticker in tickers if not self.history.has(ticker)]
+        if missing:
+            self.history.load(missing, merge=True)
+        
+        # O que a abertura do modal lê: o painel de get_advanced_indicators
+        self.get_advanced_indicators_batch(tickers)
+        # Índice de busca pronto antes da primeira tecla
+        self._snapshot.search_index.suggest(tickers[0] if tickers else 'a')
+        return tickers
     
     def get_top_fiis_by_price(self, max_price=25, limit=30):
         """Retorna os melhores FIIs abaixo de um preço máximo"""
@@ -185,34 +476,98 @@ class FIIDataHandler:
     
     def get_advanced_indicators(self, ticker):
         """Retorna indicadores avançados para um FII específico"""
-        df = self.fetch_data()
-        fii_data = df[df['Ticker'] == ticker]
-        
-        if fii_data.empty:
+        panel = self.get_advanced_indicators_batch([ticker])
+        if ticker not in panel.index.get_level_values('Ticker'):
             return None
+        return panel.loc[ticker].reset_index()
+    
+    def get_advanced_indicators_batch(self, tickers, periods=24):
+        """Indicadores avançados mensais de vários FIIs em um painel com índice (Ticker, Data)
+        
+        As linhas vêm do índice por ticker da fotografia. Tickers com histórico
+        carregado usam as matrizes mensais do PriceHistoryStore (nunca busca aqui);
+        os demais são simulados todos de uma vez. O painel é
+        guardado até a próxima fotografia ou carga de histórico, então tickers já
+        calculados viram só um recorte.
+        """
+        self.fetch_data()
+        snapshot, loaded_at = self._snapshot, self.history.loaded_at
+        df = snapshot.data
+        # Ler, completar e regravar o painel sob trava: aberturas simultâneas não perdem os tickers umas das outras
+        with self._advanced_lock:
+            cached = self._advanced_panel
+            if cached is not None and cached[0] is snapshot and cached[1] == loaded_at and cached[2] == periods:
+                panel = cached[3]
+            else:
+                panel = None
+        
+            tickers = list(dict.fromkeys(tickers))
+            done = set(panel.index.get_level_values('Ticker')) if panel is not None else set()
+            missing = [ticker for ticker in tickers if ticker not in done]
+            if missing:
+                index = snapshot.index
+                current = df.iloc[[index.position(ticker) for ticker in missing if ticker in index]]
+                current = current.set_index(current['Ticker'].astype(str))
+                parts = [panel] if panel is not None else []
+                parts += self._advanced_panel_parts(current, periods)
+                panel = pd.concat(parts).sort_index() if parts else self._empty_advanced_panel()
+                self._advanced_panel = (snapshot, loaded_at, periods, panel)
+            elif panel is None:
+                panel = self._empty_advanced_panel()
+        
+        return panel.loc[[ticker for ticker in tickers if ticker in panel.index.get_level_values('Ticker')]]
+    
+    @staticmethod
+    def _empty_advanced_panel():
+        index = pd.MultiIndex.from_arrays([[], pd.DatetimeIndex([])], names=['Ticker', 'Data'])
+        return pd.DataFrame(columns=['Preço', 'Dividendo', 'P/VP', 'Vacância', 'Cap Rate'], index=index, dtype=float)
+    
+    def _advanced_panel_parts(self, current, periods):
+        """Blocos do painel para os FIIs de `current` (indexado por ticker): histórico real e simulado"""
+        parts = []
+        prices = self.history.monthly_prices
+        if prices is not None:
+            available = prices.columns[prices.notna().any()]
+            real = current.index[current.index.isin(available)]
+        else:
+            real = current.index[:0]
+        
+        if len(real):
+            monthly = pd.concat({
+                'Preço': prices[real].iloc[-periods:],
+                'Dividendo': self.history.monthly_dividends[real].reindex(prices.index[-periods:]),
+            }, axis=1)
+            block = monthly.stack(level=1).dropna(subset=['Preço']).swaplevel()
+            block.index.names = ['Ticker', 'Data']
+            owners = block.index.get_level_values('Ticker')
+            latest = current.loc[real]
+            # Valor patrimonial por cota atual, mantido constante no período
+            book_value = latest['VPA'].astype(float) if 'VPA' in latest else latest['Preço'].astype(float) / latest['P/VP'].astype(float)
+            block['P/VP'] = block['Preço'] / book_value.reindex(owners).to_numpy()
+            # Sem fonte histórica para vacância e cap rate: repetir o valor atual
+            block['Vacância'] = latest['Vacância'].astype(float).reindex(owners).to_numpy()
+            block['Cap Rate'] = latest['Cap Rate'].astype(float).reindex(owners).to_numpy()
+            parts.append(block)
         
-        # Verificar se fii_data não está vazio
-        if fii_data.empty:
-            raise ValueError("fii_data está vazio. Não é possível gerar dados históricos.")
-
         # Em produção, você buscaria dados históricos reais
-        # Aqui, vamos simular alguns dados históricos
-        dates = pd.date_range(end=datetime.now(), periods=24, freq='M')
-
-        historical_data = {
-            'Data': dates,
-            'Preço': np.random.normal(fii_data['Preço'].values[0], fii_data['Preço'].values[0] * 0.1, 24),
-            'Dividendo': np.random.normal(fii_data['Último Dividendo'].values[0], fii_data['Último Dividendo'].values[0] * 0.2, 24),
-            'P/VP': np.random.normal(fii_data['P/VP'].values[0], 0.1, 24),
-            'Vacância': np.random.normal(fii_data['Vacância'].values[0], 2, 24),
-            'Cap Rate': np.random.normal(fii_data['Cap Rate'].values[0], 1, 24),
-        }
-
-        # Garantir que os valores façam sentido
-        historical_data['Preço'] = np.maximum(historical_data['Preço'], 5)  # Preço mínimo de R$ 5
-        historical_data['Dividendo'] = np.maximum(historical_data['Dividendo'], 0)  # Dividendo não negativo
-        historical_data['P/VP'] = np.maximum(historical_data['P/VP'], 0.3)  # P/VP mínimo de 0.3
-        historical_data['Vacância'] = np.clip(historical_data['Vacância'], 0, 100)  # Vacância entre 0% e 100%
-        historical_data['Cap Rate'] = np.clip(historical_data['Cap Rate'], 3, 20)  # Cap Rate entre 3% e 20%
-
-        return pd.DataFrame(historical_data)
+        # Aqui, simulamos os demais de uma vez: matrizes períodos x tickers
+        simulated = current.drop(real)
+        n = len(simulated)
+        if n:
+            dates = pd.date_range(end=datetime.now(), periods=periods, freq='M')
+            price = simulated['Preço'].to_numpy(dtype=float)
+            dividend = simulated['Último Dividendo'].to_numpy(dtype=float)
+            noise = lambda loc, scale: np.random.normal(loc, scale, (periods, n))
+            
+            # Garantir que os valores façam sentido
+            columns = {
+                'Preço': np.maximum(noise(price, price * 0.1), 5),  # Preço mínimo de R$ 5
+                'Dividendo': np.maximum(noise(dividend, dividend * 0.2), 0),  # Dividendo não negativo
+                'P/VP': np.maximum(noise(simulated['P/VP'].to_numpy(dtype=float), 0.1), 0.3),  # P/VP mínimo de 0.3
+                'Vacância': np.clip(noise(simulated['Vacância'].to_numpy(dtype=float), 2), 0, 100),  # Entre 0% e 100%
+                'Cap Rate': np.clip(noise(simulated['Cap Rate'].to_numpy(dtype=float), 1), 3, 20),  # Entre 3% e 20%
+            }
+            index = pd.MultiIndex.from_product([simulated.index, dates], names=['Ticker', 'Data'])
+            # Transpor para ordem ticker -> data, a mesma do índice
+            parts.append(pd.DataFrame({name: values.T.ravel() for name, values in columns.items()}, index=index))
+        return parts
@@ -0,0 +1,66 @@
+import json
+import threading
+
+from utils.locks import FileLock, atomic_write
+
+
+class AccessStats:
+    """Contagem de visualizações por ticker, persistida no diretório de cache entre execuções
+
+    Cada processo acumula as visualizações em memória e as soma ao arquivo a cada
+    `flush_every` registros (e em flush()), sob trava, para que vários workers
+    contribuam para a mesma estatística sem sobrescrever uns aos outros.
+    """
+
+    def __init__(self, path, flush_every=20):
+        self.path = path
+        self.flush_every = flush_every
+        self._pending = {}
+        self._pending_total = 0
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def record(self, ticker):
+        """Registra uma visualização do ticker"""
+        with self._lock:
+            self._pending[ticker] = self._pending.get(ticker, 0) + 1
+            self._pending_total += 1
+            due = self._pending_total >= self.flush_every
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Soma as visualizações pendentes ao arquivo"""
+        with self._lock:
+            pending, self._pending, self._pending_total = self._pending, {}, 0
+        if not pending:
+            return
+
+        try:
+            with FileLock(f"{self.path}.lock"):
+                counts = self._read()
+                for ticker, views in pending.items():
+                    counts[ticker] = counts.get(ticker, 0) + views
+                with atomic_write(self.path) as f:
+                    json.dump(counts, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"Erro ao gravar estatísticas de acesso: {e}")
+
+    def counts(self):
+        """Visualizações por ticker: as gravadas mais as ainda pendentes deste processo"""
+        counts = self._read()
+        with self._lock:
+            for ticker, views in self._pending.items():
+                counts[ticker] = counts.get(ticker, 0) + views
+        return counts
+
+    def top(self, n):
+        """Os n tickers mais vistos, do mais para o menos visto"""
+        counts = self.counts()
+        return sorted(counts, key=counts.get, reverse=True)[:n]
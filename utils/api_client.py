@@ -1,130 +1,471 @@
 import requests
+from requests.adapters import HTTPAdapter
+import numpy as np
 import pandas as pd
 import json
 import time
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from urllib.parse import urlparse
 import os
 
+from utils.cache_backends import BACKENDS
+from utils.cache_manager import CacheManager
+from utils.ingestion import StatusInvestIngester
+from utils.locks import FileLock, atomic_write
+from utils.memory_cache import MemoryCache
+from utils.scheduler import RequestScheduler
+from utils.scraping import extract_indicators, extract_many
+from utils.synthetic import generate_daily_history, history_for
+
+DEFAULT_BASE_URL = "https://statusinvest.com.br"
+# Dias cobertos por cada período de histórico; os menores são recortes da série mais longa em cache
+PERIOD_DAYS = {'1m': 30, '3m': 90, '6m': 180, '1y': 365, '2y': 730, '5y': 1825}
+# Período buscado por padrão; um período maior (2y, 5y) amplia a série do ticker em cache
+CANONICAL_PERIOD = '1y'
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
 class APIClient:
     """Cliente para APIs externas de dados financeiros"""
     
-    def __init__(self, cache_dir='./cache'):
+    def __init__(self, cache_dir='./cache', max_connections_per_host=8, timeout=15, rate_per_host=5.0,
+                 base_url=None, memory_cache_size=512, cache_backend=None, history_backend=None,
+                 max_cache_bytes=512 * 1024 * 1024, cache_ttls=None):
         self.cache_dir = cache_dir
-        self.cache_duration = 24  # horas
+        self.timeout = timeout  # segundos
+        # URL base configurável (ex.: servidor local de testes em utils/fake_server.py)
+        self.base_url = (base_url or os.environ.get('STATUS_INVEST_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        self.max_connections_per_host = max_connections_per_host
+        
+        # Sessão com pool de conexões reaproveitadas (evita um handshake TLS por requisição)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_connections_per_host)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        
+        # Todas as requisições de saída passam pelo agendador (taxa, novas tentativas e circuito por host)
+        self.scheduler = RequestScheduler(self.session, rate=rate_per_host, burst=max_connections_per_host,
+                                          max_connections_per_host=max_connections_per_host)
+        
+        # Camada em memória na frente dos arquivos JSON: o disco só é lido em faltas
+        self.memory = MemoryCache(max_entries=memory_cache_size)
         
         # Criar diretório de cache se não existir
         if not os.path.exists(cache_dir):
             os.makedirs(cache_dir)
-    
-    def get_status_invest_data(self, category_type=2):
-        """Obtém dados do Status Invest (category_type=2 para FIIs)"""
-        cache_file = os.path.join(self.cache_dir, f'status_invest_{category_type}.json')
         
-        # Verificar se existe cache válido
-        if self._is_cache_valid(cache_file):
-            return self._load_from_cache(cache_file)
-        
-        url = "https://statusinvest.com.br/category/advancedsearchresult"
-        payload = {
-            "search": {
-                "Segment": "",
-                "CategoryType": "",
-                "Search": "",
-                "Order": {"Field": "name", "Ascending": True},
-                "Pagination": {"Page": 1, "PageSize": 200}
-            },
-            "CategoryType": category_type
-        }
+        # Backends de armazenamento: arquivos JSON (histórico em colunas binárias mapeadas em memória)
+        # ou um único SQLite compartilhado por todos os workers (cache_backend='sqlite')
+        self.cache_backend = cache_backend or os.environ.get('FII_CACHE_BACKEND', 'json')
+        if history_backend is None:
+            history_backend = 'npy' if self.cache_backend == 'json' else self.cache_backend
+        self.backends = {name: backend(cache_dir) for name, backend in BACKENDS.items()}
+        self.namespace_backends = {'history': history_backend}
+        # Armazenamento compartilhado para a fotografia do universo processado (None = arquivo pickle)
+        self.shared_store = self.backends['sqlite'] if self.cache_backend == 'sqlite' else None
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Content-Type": "application/json"
-        }
+        # Validade por namespace (cache_ttls em horas) e orçamento em bytes do diretório de cache
+        self.cache_manager = CacheManager(cache_dir, backends=list(self.backends.values()), max_bytes=max_cache_bytes,
+                                          ttls=cache_ttls, on_evict=self._forget)
         
-        try:
-            response = requests.post(url, headers=headers, data=json.dumps(payload))
-            if response.status_code == 200:
-                data = response.json()
-                self._save_to_cache(cache_file, data)
+        # Travas por entrada do cache: só um processo preenche cada chave, os demais esperam
+        self._lock_dir = os.path.join(cache_dir, 'locks')
+        os.makedirs(self._lock_dir, exist_ok=True)
+        
+        # Validadores HTTP (ETag/Last-Modified) e hash do conteúdo de cada fonte
+        self._http_dir = os.path.join(cache_dir, 'http')
+        if not os.path.exists(self._http_dir):
+            os.makedirs(self._http_dir)
+        self._validators_file = os.path.join(self._http_dir, 'validators.json')
+        self._validators = self._load_from_cache(self._validators_file) if os.path.exists(self._validators_file) else {}
+        self._validators_lock = threading.Lock()
+    
+    def get_status_invest_data(self, category_type=2, page_size=100, max_workers=4):
+        """Obtém todos os dados do Status Invest (category_type=2 para FIIs), página a página"""
+        # Verificar se existe cache válido
+        cached = self._get_cached('search', str(category_type))
+        if cached is not None:
+            return cached
+        
+        with self.key_lock('search', str(category_type)):
+            # Outro processo pode ter preenchido a entrada enquanto esperávamos a trava
+            cached = self._get_cached('search', str(category_type))
+            if cached is not None:
+                return cached
+            
+            cached = self._load_stale('search', str(category_type))
+            ingester = StatusInvestIngester(self, category_type=category_type, page_size=page_size,
+                                            max_workers=max_workers)
+            
+            try:
+                pages = ingester.fetch_all()
+            
+                # Conteúdo idêntico ao do cache: apenas renovar a validade, sem interpretar as páginas
+                if cached is not None and cached.get('fingerprint') == ingester.fingerprint:
+                    self._touch('search', str(category_type), cached)
+                    return cached
+            
+                records = [record for page in sorted(pages) for record in ingester.parse_page(pages[page])[0]]
+                data = {'list': records, 'totalResults': len(records), 'fingerprint': ingester.fingerprint}
+                self._store('search', str(category_type), data)
                 return data
-            else:
-                print(f"Erro na API: {response.status_code}")
-                return None
-        except Exception as e:
-            print(f"Erro ao acessar a API: {e}")
-            return None
+            except requests.HTTPError as e:
+                print(f"Erro na API: {e.response.status_code}")
+                return cached
+            except Exception as e:
+                print(f"Erro ao acessar a API: {e}")
+                # Servir o último resultado válido (mesmo expirado) em vez de nada
+                return cached
     
     def get_fii_details(self, ticker):
         """Obtém detalhes específicos de um FII"""
-        cache_file = os.path.join(self.cache_dir, f'fii_details_{ticker}.json')
-        
         # Verificar se existe cache válido
-        if self._is_cache_valid(cache_file):
-            return self._load_from_cache(cache_file)
+        cached = self._get_cached('details', ticker)
+        if cached is not None:
+            return cached
         
-        url = f"https://statusinvest.com.br/fundos-imobiliarios/{ticker.lower()}"
+        with self.key_lock('details', ticker):
+            cached = self._get_cached('details', ticker)
+            if cached is not None:
+                return cached
+            
+            html = self._fetch_fii_page(ticker)
+            if html is None:
+                # Servir o último resultado válido (mesmo expirado) em vez de nada
+                return self._load_stale('details', ticker)
+            
+            data = self._build_fii_details(ticker, extract_indicators(html))
+            return self._store('details', ticker, data)
+    
+    def get_fii_details_many(self, tickers, max_concurrency=8, parse_workers=None):
+        """Obtém detalhes de vários FIIs em paralelo, reaproveitando conexões
         
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
+        Retorna uma lista de tuplas (ticker, dados) na ordem de conclusão: primeiro
+        os tickers já presentes no cache, depois os buscados na rede conforme terminam.
+        As páginas são baixadas em threads e interpretadas no pool de processos compartilhado
+        de utils.scraping (parse_workers só vale na criação desse pool).
+        Cada resultado também é gravado no cache individual de get_fii_details.
+        """
+        results = []
+        pending = []
+        
+        # Remover duplicados preservando a ordem e servir o que já está em cache
+        for ticker in dict.fromkeys(tickers):
+            cached = self._get_cached('details', ticker)
+            if cached is not None:
+                results.append((ticker, cached))
+            else:
+                pending.append(ticker)
+        
+        if not pending:
+            return results
+        
+        # Buscar só os tickers cuja trava conseguimos; os demais já estão sendo buscados por outro processo
+        locks = {}
+        contended = []
+        for ticker in pending:
+            lock = self.key_lock('details', ticker)
+            if not lock.acquire(blocking=False):
+                contended.append(ticker)
+                continue
+            # Outro processo pode ter preenchido e liberado a entrada entre a consulta acima e a trava
+            cached = self._get_cached('details', ticker)
+            if cached is not None:
+                lock.release()
+                results.append((ticker, cached))
+            else:
+                locks[ticker] = lock
         
         try:
-            response = requests.get(url, headers=headers)
-            if response.status_code == 200:
-                # Em um caso real, você faria web scraping aqui
-                # Para simplificar, retornaremos dados fictícios
-                data = self._generate_mock_fii_details(ticker)
-                self._save_to_cache(cache_file, data)
-                return data
+            if locks:
+                self._fetch_details_parallel(list(locks), results, max_concurrency, parse_workers)
+        finally:
+            for lock in locks.values():
+                lock.release()
+        
+        # Esperar quem está buscando e ler o resultado do cache
+        for ticker in contended:
+            results.append((ticker, self.get_fii_details(ticker)))
+        
+        return results
+    
+    def _fetch_details_parallel(self, tickers, results, max_concurrency, parse_workers):
+        """Baixa as páginas em threads, extrai os indicadores em processos e acrescenta (ticker, dados) a results"""
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as fetchers:
+            downloads = {fetchers.submit(self._fetch_fii_page, ticker): ticker for ticker in tickers}
+            
+            def downloaded():
+                for future in as_completed(downloads):
+                    ticker = downloads[future]
+                    html = future.result()
+                    if html is None:
+                        results.append((ticker, self._load_stale('details', ticker)))
+                    else:
+                        yield ticker, html
+            
+            if len(tickers) == 1:
+                # Uma página só: extrair aqui mesmo, sem passar pelo pool de processos
+                extracted = ((ticker, extract_indicators(html)) for ticker, html in downloaded())
             else:
-                print(f"Erro na API: {response.status_code}")
-                return None
+                # Cada página baixada segue direto para o pool de extração compartilhado
+                extracted = extract_many(downloaded(), max_workers=parse_workers)
+            
+            for ticker, indicators in extracted:
+                data = self._build_fii_details(ticker, indicators)
+                self._store('details', ticker, data)
+                results.append((ticker, data))
+    
+    def _fetch_fii_page(self, ticker):
+        """Baixa a página do FII; retorna o HTML ou None em caso de erro"""
+        url = f"{self.base_url}/fundos-imobiliarios/{ticker.lower()}"
+        
+        try:
+            response = self._request('GET', url)
+            if response.status_code == 200:
+                return response.text
+            print(f"Erro na API: {response.status_code}")
+            return None
         except Exception as e:
             print(f"Erro ao acessar a API: {e}")
             return None
     
+    def _build_fii_details(self, ticker, indicators):
+        """Combina os indicadores extraídos da página com os demais campos de detalhes"""
+        # Campos ainda sem extração real continuam com dados fictícios
+        data = self._generate_mock_fii_details(ticker)
+        data.update(indicators)
+        return data
+    
     def get_fii_historical_data(self, ticker, period='1y'):
-        """Obtém dados históricos de um FII"""
-        cache_file = os.path.join(self.cache_dir, f'fii_history_{ticker}_{period}.json')
+        """Obtém dados históricos de um FII (dicionário de colunas; arrays mapeados em memória no backend 'npy')
         
-        # Verificar se existe cache válido
-        if self._is_cache_valid(cache_file):
-            return self._load_from_cache(cache_file)
+        Cada ticker tem uma única série em cache, sempre buscada no período mais longo
+        (CANONICAL_PERIOD); os períodos menores são recortes dela. Só um período maior
+        que o da série em cache provoca nova busca.
+        """
+        days = PERIOD_DAYS.get(period, 365)
         
-        # Em um caso real, você usaria uma API como Alpha Vantage, Yahoo Finance, etc.
-        # Para simplificar, retornaremos dados fictícios
-        data = self._generate_mock_historical_data(ticker, period)
-        self._save_to_cache(cache_file, data)
-        return data
+        # Verificar se existe cache válido que cubra o período
+        cached = self._get_cached('history', ticker)
+        if cached is not None:
+            start = self._history_start(cached, days)
+            if start is not None:
+                return self._slice_history(cached, start)
+        
+        with self.key_lock('history', ticker):
+            cached = self._get_cached('history', ticker)
+            if cached is not None:
+                start = self._history_start(cached, days)
+                if start is not None:
+                    return self._slice_history(cached, start)
+            
+            # Em um caso real, você usaria uma API como Alpha Vantage, Yahoo Finance, etc.
+            # Para simplificar, retornaremos dados fictícios
+            longest = period if days > PERIOD_DAYS[CANONICAL_PERIOD] else CANONICAL_PERIOD
+            data = self._generate_mock_historical_data(ticker, longest)
+            data = self._store('history', ticker, data)
+            return self._slice_history(data, self._history_start(data, days) or 0)
+    
+    def get_fii_historical_data_many(self, tickers, period='1y', batch_size=500):
+        """Obtém o histórico de vários FIIs, gerando os ausentes do cache em lotes vetorizados
+        
+        Retorna {ticker: colunas} já recortado para o período pedido.
+        """
+        days = PERIOD_DAYS.get(period, 365)
+        results = {}
+        missing = []
+        for ticker in dict.fromkeys(tickers):
+            if self._covered_history(ticker, days, results) is None:
+                missing.append(ticker)
+        
+        longest = period if days > PERIOD_DAYS[CANONICAL_PERIOD] else CANONICAL_PERIOD
+        for offset in range(0, len(missing), batch_size):
+            # Outra chamada pode ter preenchido parte do lote enquanto gerávamos os anteriores
+            pending = [ticker for ticker in missing[offset:offset + batch_size]
+                       if self._covered_history(ticker, days, results) is None]
+            batch = self._generate_mock_historical_batch(pending, longest) if pending else {}
+            for ticker, data in batch.items():
+                # Gravação sob a trava da chave, como em get_fii_historical_data: dois gravadores
+                # simultâneos no backend 'npy' apagariam as colunas um do outro
+                with self.key_lock('history', ticker):
+                    if self._covered_history(ticker, days, results) is not None:
+                        continue
+                    data = self._store('history', ticker, data)
+                results[ticker] = self._slice_history(data, self._history_start(data, days) or 0)
+        return results
+    
+    def _covered_history(self, ticker, days, results):
+        """Se o cache já cobre o período, guarda o recorte em results e o retorna; senão None"""
+        cached = self._get_cached('history', ticker)
+        start = self._history_start(cached, days) if cached is not None else None
+        if start is None:
+            return None
+        results[ticker] = self._slice_history(cached, start)
+        return results[ticker]
+    
+    def _history_start(self, data, days):
+        """Índice do primeiro pregão dentro dos últimos `days` dias; None se a série não chega tão longe"""
+        dates = np.asarray(data['Date'], dtype='datetime64[ns]')
+        if len(dates) == 0:
+            return None
+        
+        cutoff = np.datetime64(datetime.now() - timedelta(days=days), 'ns')
+        # Folga de alguns dias para períodos que começam em fim de semana ou feriado
+        if dates[0] > cutoff + np.timedelta64(4, 'D'):
+            return None
+        return int(np.searchsorted(dates, cutoff, side='left'))
+    
+    def _slice_history(self, data, start):
+        """Recorta todas as colunas a partir de `start` (visões, sem cópia, para arrays do NumPy)"""
+        if start == 0:
+            return data
+        return {column: values[start:] for column, values in data.items()}
     
     def get_dividend_calendar(self):
         """Obtém o calendário de dividendos"""
-        cache_file = os.path.join(self.cache_dir, 'dividend_calendar.json')
-        
         # Verificar se existe cache válido
-        if self._is_cache_valid(cache_file):
-            return self._load_from_cache(cache_file)
+        cached = self._get_cached('calendar', None)
+        if cached is not None:
+            return cached
         
-        # Em um caso real, você usaria uma API ou faria web scraping
-        # Para simplificar, retornaremos dados fictícios
-        data = self._generate_mock_dividend_calendar()
-        self._save_to_cache(cache_file, data)
-        return data
+        with self.key_lock('calendar', None):
+            cached = self._get_cached('calendar', None)
+            if cached is not None:
+                return cached
+            
+            # Em um caso real, você usaria uma API ou faria web scraping
+            # Para simplificar, retornaremos dados fictícios
+            data = self._generate_mock_dividend_calendar()
+            return self._store('calendar', None, data)
     
-    def _is_cache_valid(self, cache_file):
-        """Verifica se o cache é válido (existe e não está expirado)"""
-        if not os.path.exists(cache_file):
-            return False
+    def _request(self, method, url, **kwargs):
+        """Executa uma requisição pela sessão compartilhada, via agendador de requisições"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.scheduler.request(method, url, **kwargs)
+    
+    def _fetch_conditional(self, method, url, source, **kwargs):
+        """Requisição condicional (If-None-Match/If-Modified-Since) para uma fonte identificada
+        
+        Retorna (conteúdo em bytes, hash sha256, mudou?). Em respostas 304 o corpo
+        anterior, guardado em disco, é devolvido no lugar do corpo vazio.
+        """
+        # Separar por host para não misturar, por exemplo, o servidor local de testes com o site real
+        source = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{urlparse(url).netloc}_{source}")
+        body_file = os.path.join(self._http_dir, f'{source}.body')
+        previous = self._validators.get(source, {})
+        
+        headers = dict(kwargs.pop('headers', None) or {})
+        if os.path.exists(body_file):
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
+        
+        response = self._request(method, url, headers=headers, **kwargs)
+        
+        if response.status_code == 304:
+            with open(body_file, 'rb') as f:
+                content = f.read()
+            os.utime(body_file, None)  # corpo ainda em uso: renovar a validade para a varredura
+            return content, previous['hash'], False
+        
+        response.raise_for_status()
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        changed = digest != previous.get('hash')
         
-        file_time = os.path.getmtime(cache_file)
-        file_datetime = datetime.fromtimestamp(file_time)
-        now = datetime.now()
+        if changed or not os.path.exists(body_file):
+            with atomic_write(body_file, 'wb') as f:
+                f.write(content)
         
-        return (now - file_datetime).total_seconds() < (self.cache_duration * 3600)
+        with self._validators_lock:
+            self._validators[source] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'hash': digest,
+            }
+            self._save_to_cache(self._validators_file, self._validators)
+        
+        return content, digest, changed
+    
+    def _backend(self, namespace):
+        """Backend de armazenamento do namespace"""
+        return self.backends[self.namespace_backends.get(namespace, self.cache_backend)]
+    
+    def _get_cached(self, namespace, key):
+        """Retorna o conteúdo válido do cache, consultando a memória antes do disco; None se ausente ou expirado"""
+        data = self.memory.get((namespace, key))
+        if data is not None:
+            # Acesso acumulado em memória (gravado em lote): a varredura vê as chaves mais lidas como recentes
+            self.cache_manager.record_access(self._backend(namespace), namespace, key)
+            return data
+        
+        if not self._is_cache_valid(namespace, key):
+            return None
+        
+        # Falta em memória com entrada válida: carregar uma vez e manter até ela expirar
+        backend = self._backend(namespace)
+        data = backend.load(namespace, key)
+        self.cache_manager.record_access(backend, namespace, key)
+        self._remember(namespace, key, data)
+        return data
+    
+    def _remember(self, namespace, key, data):
+        """Guarda o conteúdo em memória pelo tempo de validade restante da entrada em disco"""
+        saved_at = self._backend(namespace).mtime(namespace, key)
+        if saved_at is None:
+            return
+        remaining = self.cache_manager.ttl(namespace) - (time.time() - saved_at)
+        if remaining > 0:
+            self.memory.set((namespace, key), data, ttl=remaining)
+    
+    def _store(self, namespace, key, data):
+        """Grava no cache em disco e na camada em memória; retorna o conteúdo como será lido do cache"""
+        data = self._backend(namespace).save(namespace, key, data)
+        self.memory.set((namespace, key), data, ttl=self.cache_manager.ttl(namespace))
+        self.cache_manager.record_write()
+        return data
+    
+    def _touch(self, namespace, key, data):
+        """Renova a validade de uma entrada cujo conteúdo não mudou"""
+        self._backend(namespace).touch(namespace, key)
+        self._remember(namespace, key, data)
+    
+    def key_lock(self, namespace, key):
+        """Trava entre processos da entrada (namespace, key) do cache"""
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', f"{namespace}_{key}")
+        return FileLock(os.path.join(self._lock_dir, f'{name}.lock'))
+    
+    def _forget(self, namespace, key):
+        """Descarta da memória uma entrada removida do disco pela varredura"""
+        self.memory.invalidate((namespace, key))
+    
+    def cache_stats(self):
+        """Contadores da camada de cache em memória e ocupação do disco por namespace"""
+        return dict(self.memory.stats(), disk=self.cache_manager.usage())
+    
+    def sweep_cache(self, dry_run=False):
+        """Remove entradas muito antigas e as menos usadas até o cache caber no orçamento"""
+        return self.cache_manager.sweep(dry_run=dry_run)
+    
+    def _is_cache_valid(self, namespace, key):
+        """Verifica se o cache é válido (existe e não está expirado)"""
+        return self.cache_manager.is_fresh(namespace, self._backend(namespace).mtime(namespace, key))
+    
+    def _load_stale(self, namespace, key):
+        """Carrega o cache mesmo se expirado; retorna None se não existir"""
+        backend = self._backend(namespace)
+        if not backend.exists(namespace, key):
+            return None
+        return backend.load(namespace, key)
     
     def _save_to_cache(self, cache_file, data):
         """Salva dados no cache"""
-        with open(cache_file, 'w', encoding='utf-8') as f:
+        with atomic_write(cache_file) as f:
             json.dump(data, f, ensure_ascii=False, indent=4)
     
     def _load_from_cache(self, cache_file):
@@ -160,65 +501,12 @@ class APIClient:
     
     def _generate_mock_historical_data(self, ticker, period):
         """Gera dados históricos fictícios para um FII"""
-        import random
-        import numpy as np
-        
-        # Determinar número de dias com base no período
-        days = 365
-        if period == '6m':
-            days = 180
-        elif period == '3m':
-            days = 90
-        elif period == '1m':
-            days = 30
-        
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        # Gerar datas de negociação (dias úteis)
-        dates = []
-        current_date = start_date
-        while current_date <= end_date:
-            if current_date.weekday() < 5:  # 0-4 são dias úteis (seg-sex)
-                dates.append(current_date)
-            current_date += timedelta(days=1)
-        
-        # Gerar preços com tendência aleatória
-        base_price = random.uniform(50, 200)
-        trend = random.uniform(-0.0001, 0.0001)
-        volatility = random.uniform(0.005, 0.02)
-        
-        prices = [base_price]
-        for i in range(1, len(dates)):
-            price_change = trend + random.normalvariate(0, volatility)
-            new_price = prices[-1] * (1 + price_change)
-            prices.append(max(10, new_price))  # Garantir preço mínimo de R$ 10
-        
-        # Gerar dividendos mensais
-        dividends = []
-        last_month = None
-        for date in dates:
-            if last_month != date.month:
-                last_month = date.month
-                dividend = round(random.uniform(0.4, 1.2), 4)
-            else:
-                dividend = 0
-            dividends.append(dividend)
-        
-        # Criar DataFrame
-        data = {
-            'Date': dates,
-            'Price': prices,
-            'Dividend': dividends,
-            'Volume': [int(random.uniform(100000, 5000000)) for _ in range(len(dates))],
-        }
-        
-        # Adicionar P/VP e outros indicadores
-        data['P/VP'] = [round(price / (base_price * random.uniform(0.8, 1.2)), 2) for price in prices]
-        data['Vacância'] = [round(random.uniform(0, 15), 2) for _ in range(len(dates))]
-        data['Cap Rate'] = [round(random.uniform(6, 12), 2) for _ in range(len(dates))]
-        
-        return data
+        return self._generate_mock_historical_batch([ticker], period)[ticker]
+    
+    def _generate_mock_historical_batch(self, tickers, period):
+        """Gera dados históricos fictícios para vários FIIs de uma vez ({ticker: colunas})"""
+        panel = generate_daily_history(tickers, days=PERIOD_DAYS.get(period, 365))
+        return {ticker: history_for(panel, position) for position, ticker in enumerate(panel['tickers'])}
     
     def _generate_mock_dividend_calendar(self):
         """Gera um calendário de dividendos fictício"""
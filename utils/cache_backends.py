@@ -0,0 +1,346 @@
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+
+from utils.locks import atomic_write, remove_idle_lock
+
+# Namespaces do cache e o prefixo de arquivo usado por cada um
+NAMESPACES = {
+    'search': 'status_invest',
+    'details': 'fii_details',
+    'history': 'fii_history',
+    'calendar': 'dividend_calendar',
+}
+
+
+def _json_default(value):
+    """Converte tipos do NumPy e datas para algo serializável em JSON"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+class JSONBackend:
+    """Um arquivo JSON por chave, no formato original do cache"""
+
+    extension = '.json'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def path(self, namespace, key):
+        prefix = NAMESPACES.get(namespace, namespace)
+        name = f"{prefix}_{key}" if key not in (None, '') else prefix
+        return os.path.join(self.cache_dir, name + self.extension)
+
+    def stamp_path(self, namespace, key):
+        """Arquivo cujos tempos marcam a gravação (mtime) e o último acesso (atime) da entrada"""
+        return self.path(namespace, key)
+
+    def exists(self, namespace, key):
+        return os.path.exists(self.stamp_path(namespace, key))
+
+    def mtime(self, namespace, key):
+        """Momento da última gravação (epoch) ou None se a entrada não existir"""
+        try:
+            return os.path.getmtime(self.stamp_path(namespace, key))
+        except OSError:
+            return None
+
+    def touch(self, namespace, key):
+        os.utime(self.stamp_path(namespace, key), None)
+
+    def mark_access(self, namespace, key, when):
+        """Registra o acesso no atime sem alterar o mtime, que define a validade"""
+        stamp = self.stamp_path(namespace, key)
+        try:
+            os.utime(stamp, (when, os.path.getmtime(stamp)))
+        except OSError:
+            pass
+
+    def _size(self, path):
+        return os.path.getsize(path)
+
+    def entries(self):
+        """Lista as entradas gravadas por este backend: dicionários com namespace, key, bytes, atime e mtime"""
+        prefixes = sorted(NAMESPACES.items(), key=lambda item: len(item[1]), reverse=True)
+        found = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return found
+
+        for name in names:
+            if not name.endswith(self.extension):
+                continue
+            stem = name[:-len(self.extension)]
+            for namespace, prefix in prefixes:
+                if stem == prefix:
+                    key = None
+                elif stem.startswith(prefix + '_'):
+                    key = stem[len(prefix) + 1:]
+                else:
+                    continue
+                try:
+                    stat = os.stat(self.stamp_path(namespace, key))
+                    size = self._size(self.path(namespace, key))
+                except OSError:
+                    break
+                found.append({'backend': self, 'namespace': namespace, 'key': key, 'bytes': size,
+                              'atime': stat.st_atime, 'mtime': stat.st_mtime})
+                break
+        return found
+
+    def load(self, namespace, key):
+        with open(self.path(namespace, key), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save(self, namespace, key, data):
+        """Grava a entrada de forma atômica e retorna o conteúdo na forma em que load o devolveria"""
+        with atomic_write(self.path(namespace, key)) as f:
+            json.dump(data, f, ensure_ascii=False, indent=4, default=_json_default)
+        return data
+
+    def delete(self, namespace, key):
+        try:
+            os.remove(self.path(namespace, key))
+        except FileNotFoundError:
+            pass
+
+
+class NpyBackend(JSONBackend):
+    """Séries em colunas binárias: um diretório por chave com um .npy por coluna e um manifesto
+
+    As colunas são abertas com mmap_mode='r', então carregar a série de um ticker
+    não copia os dados; só as páginas efetivamente lidas vêm do disco. Datas viram
+    datetime64[ns] e textos, arrays Unicode de tamanho fixo.
+
+    Cada gravação cria arquivos de coluna novos e só então troca o manifesto de forma
+    atômica; leitores veem sempre um conjunto de colunas completo e consistente.
+    """
+
+    extension = '.npycols'
+    manifest_name = 'manifest.json'
+
+    def stamp_path(self, namespace, key):
+        # O manifesto é gravado por último e marca a entrada como completa
+        return os.path.join(self.path(namespace, key), self.manifest_name)
+
+    def _size(self, path):
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+    @staticmethod
+    def _to_array(values):
+        array = np.asarray(values)
+        if array.dtype == object and len(array) and isinstance(array[0], (datetime, date)):
+            return array.astype('datetime64[ns]')
+        if array.dtype == object:
+            return array.astype(str)
+        return array
+
+    def _read_manifest(self, directory):
+        with open(os.path.join(directory, self.manifest_name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, namespace, key):
+        directory = self.path(namespace, key)
+        for attempt in range(3):
+            manifest = self._read_manifest(directory)
+            try:
+                return {
+                    column['name']: np.load(os.path.join(directory, column['file']), mmap_mode='r')
+                    for column in manifest['columns']
+                }
+            except FileNotFoundError:
+                # Uma gravação concorrente trocou o manifesto entre a leitura e a abertura das colunas
+                if attempt == 2:
+                    raise
+
+    def save(self, namespace, key, data):
+        """Grava cada coluna de um dicionário {coluna: valores} em seu próprio .npy"""
+        directory = self.path(namespace, key)
+        os.makedirs(directory, exist_ok=True)
+
+        version = uuid.uuid4().hex[:12]
+        columns = []
+        for i, (name, values) in enumerate(data.items()):
+            array = self._to_array(values)
+            file_name = f"{i}-{version}.npy"
+            with atomic_write(os.path.join(directory, file_name), 'wb') as f:
+                np.save(f, array, allow_pickle=False)
+            columns.append({'name': name, 'file': file_name, 'dtype': array.dtype.str, 'length': len(array)})
+
+        with atomic_write(os.path.join(directory, self.manifest_name)) as f:
+            json.dump({'columns': columns}, f, ensure_ascii=False)
+
+        # Remover colunas de versões anteriores (quem já as mapeou continua lendo normalmente)
+        current = {column['file'] for column in columns}
+        for file_name in os.listdir(directory):
+            if file_name.endswith('.npy') and file_name not in current:
+                try:
+                    os.remove(os.path.join(directory, file_name))
+                except OSError:
+                    pass
+        return self.load(namespace, key)
+
+    def delete(self, namespace, key):
+        shutil.rmtree(self.path(namespace, key), ignore_errors=True)
+
+
+class SQLiteBackend:
+    """Todas as entradas em um único arquivo SQLite (modo WAL), indexadas por (namespace, key)
+
+    Vários processos leem e escrevem o mesmo arquivo ao mesmo tempo; a validade de uma
+    entrada é uma consulta ao saved_at em vez de um stat por arquivo. Os valores são
+    gravados com pickle, o que também permite guardar DataFrames e arrays do NumPy.
+    """
+
+    file_name = 'cache.sqlite3'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(cache_dir, self.file_name)
+        self._local = threading.local()  # uma conexão por thread (e por processo)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,'
+                ' saved_at REAL NOT NULL, accessed_at REAL NOT NULL, bytes INTEGER NOT NULL,'
+                ' PRIMARY KEY (namespace, key)) WITHOUT ROWID'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS entries_saved_at ON entries (namespace, saved_at)')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    @staticmethod
+    def _key(key):
+        return '' if key is None else str(key)
+
+    def exists(self, namespace, key):
+        return self.mtime(namespace, key) is not None
+
+    def mtime(self, namespace, key):
+        row = self._connection().execute('SELECT saved_at FROM entries WHERE namespace = ? AND key = ?',
+                                         (namespace, self._key(key))).fetchone()
+        return row[0] if row else None
+
+    def touch(self, namespace, key):
+        self._connection().execute('UPDATE entries SET saved_at = ? WHERE namespace = ? AND key = ?',
+                                   (time.time(), namespace, self._key(key)))
+
+    def mark_access(self, namespace, key, when):
+        self._connection().execute('UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                                   (when, namespace, self._key(key)))
+
+    def load(self, namespace, key):
+        row = self._connection().execute('SELECT value FROM entries WHERE namespace = ? AND key = ?',
+                                         (namespace, self._key(key))).fetchone()
+        if row is None:
+            raise KeyError((namespace, key))
+        return pickle.loads(row[0])
+
+    def save(self, namespace, key, data):
+        value = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        self._connection().execute(
+            'INSERT OR REPLACE INTO entries (namespace, key, value, saved_at, accessed_at, bytes) VALUES (?, ?, ?, ?, ?, ?)',
+            (namespace, self._key(key), value, now, now, len(value)),
+        )
+        return data
+
+    def delete(self, namespace, key):
+        self._connection().execute('DELETE FROM entries WHERE namespace = ? AND key = ?',
+                                   (namespace, self._key(key)))
+
+    def entries(self):
+        """Entradas dos namespaces de cache (a fotografia do universo não entra na varredura)"""
+        if not os.path.exists(self.db_path):
+            return []
+        placeholders = ', '.join('?' for _ in NAMESPACES)
+        rows = self._connection().execute(
+            f'SELECT namespace, key, bytes, accessed_at, saved_at FROM entries WHERE namespace IN ({placeholders})',
+            tuple(NAMESPACES),
+        ).fetchall()
+        return [{'backend': self, 'namespace': namespace, 'key': key or None, 'bytes': size,
+                 'atime': accessed_at, 'mtime': saved_at}
+                for namespace, key, size, accessed_at, saved_at in rows]
+
+
+class AuxiliaryFiles:
+    """Arquivos auxiliares de um subdiretório do cache, vistos pela varredura como entradas
+
+    Não guarda dados do cache: só lista os arquivos (um por chave) e os remove, para
+    que as travas por chave e os corpos das respostas HTTP também entrem na validade
+    e no orçamento do diretório. Arquivos de trava em uso não são removidos.
+    """
+
+    def __init__(self, cache_dir, namespace, subdir, extension):
+        self.directory = os.path.join(cache_dir, subdir)
+        self.namespace = namespace
+        self.extension = extension
+
+    def path(self, namespace, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def mark_access(self, namespace, key, when):
+        pass
+
+    def delete(self, namespace, key):
+        path = self.path(namespace, key)
+        if self.extension == '.lock':
+            remove_idle_lock(path)
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        found = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return found
+        for name in names:
+            if not name.endswith(self.extension):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            found.append({'backend': self, 'namespace': self.namespace, 'key': name[:-len(self.extension)],
+                          'bytes': stat.st_size, 'atime': stat.st_atime, 'mtime': stat.st_mtime})
+        return found
+
+
+def auxiliary_files(cache_dir):
+    """Travas por chave (cache/locks) e corpos das respostas HTTP (cache/http)"""
+    return [
+        AuxiliaryFiles(cache_dir, 'locks', 'locks', '.lock'),
+        AuxiliaryFiles(cache_dir, 'http', 'http', '.body'),
+    ]
+
+
+BACKENDS = {
+    'json': JSONBackend,
+    'npy': NpyBackend,
+    'sqlite': SQLiteBackend,
+}
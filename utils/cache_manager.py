@@ -0,0 +1,135 @@
+import argparse
+import threading
+import time
+
+from utils.cache_backends import BACKENDS, auxiliary_files
+
+# Validade de cada namespace, em horas: preços envelhecem em um dia, cadastro do fundo dura uma semana
+DEFAULT_TTLS = {
+    'search': 4,
+    'details': 7 * 24,
+    'history': 24,
+    'calendar': 12,
+    # Arquivos auxiliares: travas ociosas saem logo; corpos HTTP são renovados a cada 304
+    'locks': 1,
+    'http': 24,
+}
+
+
+class CacheManager:
+    """Orçamento em bytes e validade por namespace para o diretório de cache
+
+    Entradas expiradas continuam servindo de último recurso (dados antigos em vez de
+    nada) até passarem de `stale_factor` vezes a validade; a varredura remove essas e
+    depois descarta as menos usadas recentemente até o total caber em `max_bytes`.
+    O último acesso fica no atime do arquivo, gravado em lote para não tocar o disco
+    a cada leitura servida da memória.
+    """
+
+    def __init__(self, cache_dir, backends=None, max_bytes=512 * 1024 * 1024, ttls=None, stale_factor=2,
+                 sweep_every=100, on_evict=None):
+        self.cache_dir = cache_dir
+        self.backends = backends if backends is not None else [backend(cache_dir) for backend in BACKENDS.values()]
+        self.auxiliary = auxiliary_files(cache_dir)  # travas e corpos HTTP, só para varredura e orçamento
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))  # horas
+        self.stale_factor = stale_factor
+        self.sweep_every = sweep_every  # gravações entre varreduras automáticas
+        self.on_evict = on_evict  # callback(namespace, key) para invalidar camadas em memória
+
+        self._accesses = {}  # (backend, namespace, key) -> último acesso ainda não gravado
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def ttl(self, namespace):
+        """Validade do namespace em segundos"""
+        return self.ttls.get(namespace, 24) * 3600
+
+    def is_fresh(self, namespace, saved_at, now=None):
+        return saved_at is not None and ((now or time.time()) - saved_at) < self.ttl(namespace)
+
+    def record_access(self, backend, namespace, key):
+        with self._lock:
+            self._accesses[(backend, namespace, key)] = time.time()
+
+    def record_write(self):
+        """Conta uma gravação e dispara a varredura a cada `sweep_every` gravações"""
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.sweep_every == 0
+        if due:
+            self.sweep()
+
+    def flush_accesses(self):
+        """Grava no disco os acessos acumulados em memória"""
+        with self._lock:
+            accesses, self._accesses = self._accesses, {}
+        for (backend, namespace, key), when in accesses.items():
+            backend.mark_access(namespace, key, when)
+
+    def entries(self):
+        return [entry for backend in self.backends + self.auxiliary for entry in backend.entries()]
+
+    def usage(self):
+        """Bytes e número de entradas por namespace"""
+        report = {}
+        for entry in self.entries():
+            item = report.setdefault(entry['namespace'], {'entries': 0, 'bytes': 0})
+            item['entries'] += 1
+            item['bytes'] += entry['bytes']
+        return report
+
+    def sweep(self, dry_run=False):
+        """Remove entradas velhas demais e, se preciso, as menos usadas até caber no orçamento"""
+        self.flush_accesses()
+        now = time.time()
+        entries = self.entries()
+        total = sum(entry['bytes'] for entry in entries)
+
+        expired, remaining = [], []
+        for entry in entries:
+            too_old = now - entry['mtime'] >= self.ttl(entry['namespace']) * self.stale_factor
+            (expired if too_old else remaining).append(entry)
+
+        evicted = []
+        size = total - sum(entry['bytes'] for entry in expired)
+        for entry in sorted(remaining, key=lambda entry: max(entry['atime'], entry['mtime'])):
+            if size <= self.max_bytes:
+                break
+            evicted.append(entry)
+            size -= entry['bytes']
+
+        if not dry_run:
+            for entry in expired + evicted:
+                entry['backend'].delete(entry['namespace'], entry['key'])
+                if self.on_evict is not None:
+                    self.on_evict(entry['namespace'], entry['key'])
+
+        return {
+            'entries': len(entries),
+            'bytes_before': total,
+            'bytes_after': size,
+            'max_bytes': self.max_bytes,
+            'expired': len(expired),
+            'evicted': len(evicted),
+            'dry_run': dry_run,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Relatório e limpeza do diretório de cache")
+    parser.add_argument('--cache-dir', default='./cache')
+    parser.add_argument('--max-mb', type=float, default=512, help="Orçamento do cache em MB")
+    parser.add_argument('--dry-run', action='store_true', help="Apenas relatar o que seria removido")
+    args = parser.parse_args()
+
+    manager = CacheManager(args.cache_dir, max_bytes=int(args.max_mb * 1024 * 1024))
+    for namespace, item in sorted(manager.usage().items()):
+        print(f"{namespace:10s} {item['entries']:6d} entradas  {item['bytes'] / 1024:10.1f} KB  "
+              f"validade {manager.ttls.get(namespace, 24)}h")
+
+    result = manager.sweep(dry_run=args.dry_run)
+    action = "Seriam removidas" if args.dry_run else "Removidas"
+    print(f"{action} {result['expired']} entradas expiradas e {result['evicted']} por falta de espaço")
+    print(f"Tamanho: {result['bytes_before'] / 1024:.1f} KB -> {result['bytes_after'] / 1024:.1f} KB "
+          f"(limite {result['max_bytes'] / 1024:.1f} KB)")
@@ -0,0 +1,288 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.synthetic import generate_raw_records
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'status_invest')
+SEARCH_FIXTURE = 'advancedsearchresult.json'
+PAGE_TEMPLATE = 'fii_page.html'
+
+
+def _format_brl(value):
+    """Formata um número no padrão brasileiro (1.234,56)"""
+    return f"{value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    """Responde como o Status Invest a partir das fixtures gravadas"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.fake.handle(self)
+
+    def do_POST(self):
+        self.server.fake.handle(self)
+
+    def log_message(self, format, *args):
+        if self.server.fake.verbose:
+            super().log_message(format, *args)
+
+
+class FakeStatusInvestServer:
+    """Servidor local que reproduz a busca avançada e as páginas de FII, com falhas injetáveis
+
+    latency/jitter em segundos por resposta; error_rate e rate_429 são probabilidades de
+    responder 503 e 429; rate_limit (requisições/s) devolve 429 quando excedido; rows
+    replica as fixtures até o número de linhas desejado para testes de volume.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, fixtures_dir=FIXTURES_DIR, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_429=0.0, rate_limit=None, retry_after=1, rows=None, seed=None,
+                 verbose=False):
+        self.host = host
+        self.port = port
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.verbose = verbose
+        self.seed = seed
+
+        self.records = self._load_records(rows)
+        self._by_ticker = {record['ticker'].upper(): record for record in self.records}
+        with open(os.path.join(fixtures_dir, PAGE_TEMPLATE), 'r', encoding='utf-8') as f:
+            self._template = f.read()
+
+        self.stats = {'requests': 0, 'search': 0, 'pages': 0, 'not_modified': 0, 'errors': 0, 'throttled': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._httpd = None
+        self._thread = None
+
+    def _load_records(self, rows):
+        with open(os.path.join(self.fixtures_dir, SEARCH_FIXTURE), 'r', encoding='utf-8') as f:
+            records = json.load(f)['list']
+        if rows is None or rows <= len(records):
+            return records if rows is None else records[:rows]
+
+        # Completar as fixtures com FIIs sintéticos (reprodutíveis pela semente) para simular universos maiores
+        known = {record['ticker'] for record in records}
+        extra = [record for record in generate_raw_records(rows, seed=self.seed) if record['ticker'] not in known]
+        return records + extra[:rows - len(records)]
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        """Inicia o servidor em uma thread; com port=0 uma porta livre é escolhida"""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _FakeHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-status-invest', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _throttled(self):
+        """Aplica o limite de requisições por segundo e a taxa de 429 aleatórios"""
+        with self._lock:
+            if self.rate_limit:
+                now = time.monotonic()
+                if now - self._window_start >= 1:
+                    self._window_start, self._window_count = now, 0
+                self._window_count += 1
+                if self._window_count > self.rate_limit:
+                    return True
+            return self._random.random() < self.rate_429
+
+    def handle(self, request):
+        self._count('requests')
+        request.close_connection = False
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self._throttled():
+            self._count('throttled')
+            return self._send(request, 429, b'', headers={'Retry-After': str(self.retry_after)})
+        with self._lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            self._count('errors')
+            return self._send(request, 503, b'')
+
+        parsed = urlparse(request.path)
+        if parsed.path.rstrip('/') == '/category/advancedsearchresult':
+            self._count('search')
+            return self._send_json(request, self._search(request, parsed))
+        if parsed.path.startswith('/fundos-imobiliarios/'):
+            ticker = parsed.path.rstrip('/').rsplit('/', 1)[-1].upper()
+            html = self._page(ticker)
+            if html is None:
+                return self._send(request, 404, b'')
+            self._count('pages')
+            return self._send(request, 200, html.encode('utf-8'), content_type='text/html; charset=utf-8')
+        return self._send(request, 404, b'')
+
+    def _search(self, request, parsed):
+        """Aplica a paginação pedida (query string ou corpo JSON) sobre as fixtures"""
+        params = parse_qs(parsed.query)
+        search = json.loads(params['search'][0]) if 'search' in params else {}
+
+        length = int(request.headers.get('Content-Length') or 0)
+        if length:
+            body = request.rfile.read(length)
+            if not search:
+                try:
+                    search = json.loads(body).get('search', {})
+                except (ValueError, AttributeError):
+                    search = {}
+
+        pagination = search.get('Pagination', {}) if isinstance(search, dict) else {}
+        page = int(pagination.get('Page', 1))
+        page_size = int(pagination.get('PageSize', len(self.records) or 1))
+        start = (page - 1) * page_size
+        return {'list': self.records[start:start + page_size], 'totalResults': len(self.records)}
+
+    def _page(self, ticker):
+        """Página gravada do ticker, se houver; senão o modelo preenchido com os dados da fixture"""
+        recorded = os.path.join(self.fixtures_dir, f'fii_{ticker.lower()}.html')
+        if os.path.exists(recorded):
+            with open(recorded, 'r', encoding='utf-8') as f:
+                return f.read()
+
+        record = self._by_ticker.get(ticker)
+        if record is None:
+            return None
+
+        # Valores estáveis por ticker para vacância e cap rate, que não estão na busca avançada
+        seed = int(hashlib.md5(ticker.encode('utf-8')).hexdigest()[:8], 16)
+        values = {
+            'ticker': ticker,
+            'name': record.get('companyname', ticker),
+            'price': _format_brl(record.get('price') or 0),
+            'dy': _format_brl(record.get('dy12m') or 0),
+            'pvp': _format_brl(record.get('pvp') or 0),
+            'last_dividend': _format_brl(record.get('lastdividend') or 0),
+            'net_worth': f"{_format_brl((seed % 3000 + 100) / 1000)} B",
+            'vacancy': _format_brl(seed % 2000 / 100),
+            'cap_rate': _format_brl(6 + seed % 600 / 100),
+        }
+        html = self._template
+        for name, value in values.items():
+            html = html.replace('{{' + name + '}}', str(value))
+        return html
+
+    def _send_json(self, request, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        if request.headers.get('If-None-Match') == etag:
+            self._count('not_modified')
+            return self._send(request, 304, b'', headers={'ETag': etag})
+        return self._send(request, 200, body, content_type='application/json; charset=utf-8',
+                          headers={'ETag': etag})
+
+    def _send(self, request, status, body, content_type=None, headers=None):
+        request.send_response(status)
+        if content_type:
+            request.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        if body:
+            request.wfile.write(body)
+
+
+def record_fixtures(tickers, base_url=None, out_dir=FIXTURES_DIR, page_size=500):
+    """Grava a busca avançada completa e as páginas dos tickers informados a partir do site real"""
+    from utils.api_client import APIClient
+    from utils.ingestion import StatusInvestIngester
+
+    # Cache, travas e validadores do cliente de gravação ficam fora do diretório versionado das fixtures
+    with tempfile.TemporaryDirectory() as cache_dir:
+        client = APIClient(cache_dir=cache_dir, base_url=base_url)
+        ingester = StatusInvestIngester(client, page_size=page_size)
+        pages = dict(ingester.iter_pages())
+        records = [record for page in sorted(pages) for record in pages[page]]
+
+        with open(os.path.join(out_dir, SEARCH_FIXTURE), 'w', encoding='utf-8') as f:
+            json.dump({'list': records, 'totalResults': len(records)}, f, ensure_ascii=False, indent=4)
+
+        for ticker in tickers:
+            html = client._fetch_fii_page(ticker)
+            if html is not None:
+                with open(os.path.join(out_dir, f'fii_{ticker.lower()}.html'), 'w', encoding='utf-8') as f:
+                    f.write(html)
+
+    return len(records)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Servidor local que imita o Status Invest")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help="Servir as fixtures gravadas")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency', type=float, default=0.0, help="Latência fixa por resposta (s)")
+    serve.add_argument('--jitter', type=float, default=0.0, help="Latência aleatória adicional (s)")
+    serve.add_argument('--error-rate', type=float, default=0.0, help="Probabilidade de responder 503")
+    serve.add_argument('--rate-429', type=float, default=0.0, help="Probabilidade de responder 429")
+    serve.add_argument('--rate-limit', type=float, default=None, help="Requisições/s antes de responder 429")
+    serve.add_argument('--rows', type=int, default=None, help="Replicar as fixtures até este número de FIIs")
+    serve.add_argument('--seed', type=int, default=None)
+
+    record = commands.add_parser('record', help="Gravar fixtures a partir do site real")
+    record.add_argument('tickers', nargs='*', help="Tickers cujas páginas serão gravadas")
+    record.add_argument('--base-url', default=None)
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        server = FakeStatusInvestServer(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                                        error_rate=args.error_rate, rate_429=args.rate_429,
+                                        rate_limit=args.rate_limit, rows=args.rows, seed=args.seed, verbose=True)
+        server.start()
+        print(f"Servidor de testes em {server.url} ({len(server.records)} FIIs)")
+        print(f"Use STATUS_INVEST_BASE_URL={server.url} para apontar o dashboard para ele")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+    else:
+        total = record_fixtures(args.tickers, base_url=args.base_url)
+        print(f"{total} FIIs gravados em {FIXTURES_DIR}")
@@ -0,0 +1,171 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class FilterEngine:
+    """Filtros sobre um DataFrame fixo usando colunas pré-ordenadas
+
+    Para cada coluna consultada guarda-se, uma única vez, a ordem das linhas e os
+    valores ordenados (categorias e textos viram códigos inteiros). Cada predicado
+    de faixa ou igualdade vira um intervalo via searchsorted, cujo tamanho é o número
+    de linhas que ele aceita: o mais seletivo fornece os candidatos e os demais são
+    conferidos só sobre eles. O DataFrame é materializado uma vez, com take, no fim.
+    Com um SearchIndex, "contém" sobre as colunas dele usa os trigramas em vez de
+    percorrer os textos.
+    """
+
+    def __init__(self, df, search=None):
+        self.df = df
+        self.search = search
+        self._sorted = {}  # coluna -> (ordem das linhas, chaves ordenadas)
+        self._codes = {}  # coluna categórica -> (códigos por linha, {valor: código})
+        self._lower = {}  # coluna de texto -> valores em minúsculas
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def _categorical(self, column):
+        """Códigos inteiros por linha e o mapa valor -> código de uma coluna não numérica"""
+        codes = self._codes.get(column)
+        if codes is None:
+            values = self.df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                row_codes, categories = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                row_codes, categories = pd.factorize(values)
+            codes = self._codes[column] = (row_codes, {value: code for code, value in enumerate(categories)})
+        return codes
+
+    def _keys(self, column):
+        """Valores comparáveis da coluna: o próprio array numérico ou os códigos das categorias"""
+        values = self.df[column]
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            return values.to_numpy()
+        return self._categorical(column)[0]
+
+    def _presorted(self, column):
+        entry = self._sorted.get(column)
+        if entry is None:
+            with self._lock:
+                entry = self._sorted.get(column)
+                if entry is None:
+                    keys = self._keys(column)
+                    order = np.argsort(keys, kind='stable')  # NaN vai para o fim e nunca cai numa faixa
+                    entry = self._sorted[column] = (order, keys[order])
+        return entry
+
+    def _lowercase(self, column):
+        values = self._lower.get(column)
+        if values is None:
+            values = self._lower[column] = self.df[column].astype(str).str.lower().to_numpy()
+        return values
+
+    @staticmethod
+    def _bound(keys, value):
+        """Limite convertido para o tipo da coluna
+        
+        Sem isso o numpy promove uma coluna float32 a float64 e float32(0.8) =
+        0.80000001 deixa de satisfazer "<= 0.8", ao contrário da máscara do pandas.
+        """
+        return value if value is None or keys.dtype.kind != 'f' else keys.dtype.type(value)
+
+    def _span(self, column, low=None, high=None):
+        """Intervalo [início, fim) das posições ordenadas aceitas por low <= valor <= high"""
+        order, keys = self._presorted(column)
+        low, high = self._bound(keys, low), self._bound(keys, high)
+        start = 0 if low is None else np.searchsorted(keys, low, side='left')
+        if high is not None:
+            end = np.searchsorted(keys, high, side='right')
+        elif keys.dtype.kind == 'f':
+            end = np.searchsorted(keys, np.nan, side='left')  # excluir os NaN do fim
+        else:
+            end = len(keys)
+        return int(start), int(max(start, end))
+
+    def positions(self, ranges=None, equals=None, contains=None):
+        """Posições (em ordem crescente) das linhas que atendem a todos os predicados
+
+        ranges: {coluna: (mínimo ou None, máximo ou None)}, limites inclusivos
+        equals: {coluna: valor}
+        contains: {coluna: texto ou lista de textos} (sem diferenciar maiúsculas, sem regex)
+        """
+        # Igualdade é a faixa [código, código] sobre os códigos da coluna
+        bounds = [(column, low, high) for column, (low, high) in (ranges or {}).items()
+                  if low is not None or high is not None]
+        for column, value in (equals or {}).items():
+            code = self._categorical(column)[1].get(value)
+            if code is None:
+                return np.empty(0, dtype=np.intp)
+            bounds.append((column, code, code))
+
+        if bounds:
+            # O predicado mais seletivo fornece os candidatos; os demais só conferem esses
+            spans = sorted(((self._span(column, low, high), column, low, high) for column, low, high in bounds),
+                           key=lambda item: item[0][1] - item[0][0])
+            (start, end), column, _, _ = spans[0]
+            candidates = self._presorted(column)[0][start:end]
+            for _, column, low, high in spans[1:]:
+                if not len(candidates):
+                    break
+                keys = self._keys(column)[candidates]
+                low, high = self._bound(keys, low), self._bound(keys, high)
+                mask = np.ones(len(candidates), dtype=bool)
+                if low is not None:
+                    mask &= keys >= low
+                if high is not None:
+                    mask &= keys <= high
+                candidates = candidates[mask]
+        else:
+            candidates = np.arange(len(self.df))
+
+        for column, texts in (contains or {}).items():
+            for text in ([texts] if isinstance(texts, str) else texts):
+                if not text or not len(candidates):
+                    continue
+                text = str(text).lower()
+                hits = None
+                if self.search is not None and column in self.search.columns:
+                    hits = self.search.containing(column, text)
+                if hits is not None:
+                    candidates = hits if len(candidates) == len(self.df) else candidates[np.isin(candidates, hits)]
+                    continue
+                lowered = self._lowercase(column)[candidates]
+                candidates = candidates[np.fromiter((text in value for value in lowered), dtype=bool,
+                                                    count=len(lowered))]
+
+        return np.sort(candidates)
+
+    def select(self, ranges=None, equals=None, contains=None):
+        """DataFrame com as linhas que atendem aos predicados, na ordem original"""
+        return self.df.take(self.positions(ranges, equals, contains))
+
+
+if __name__ == '__main__':
+    # Uso: python -m utils.filter_engine  (confere o motor contra as máscaras do pandas nos limites dos sliders)
+    from utils.synthetic import generate_universe
+
+    # Valores cotados com duas casas, como na fonte, para que os limites dos sliders coincidam com dados
+    df = generate_universe(5000, seed=7)
+    df = df.assign(**{column: df[column].round(2) for column in ('Preço', 'DY Anual', 'P/VP', 'Vacância')})
+    engine = FilterEngine(df)
+    checks = [('P/VP', None, step / 10) for step in range(0, 21)]
+    checks += [('DY Anual', step / 2, None) for step in range(0, 31)]
+    checks += [('Preço', None, float(price)) for price in range(0, 501, 10)]
+    checks += [('Vacância', None, float(value)) for value in range(0, 31)]
+    checks += [('P/VP', 0.8, 1.2), ('Cap Rate', 7.5, None)]
+
+    failures = 0
+    for column, low, high in checks:
+        expected = pd.Series(True, index=df.index)
+        if low is not None:
+            expected &= df[column] >= low
+        if high is not None:
+            expected &= df[column] <= high
+        got = engine.positions(ranges={column: (low, high)})
+        if not np.array_equal(got, np.flatnonzero(expected.to_numpy())):
+            failures += 1
+            print(f"Divergência em {low} <= {column} <= {high}: {len(got)} x {int(expected.sum())}")
+    print(f"{len(checks) - failures}/{len(checks)} faixas iguais às máscaras do pandas")
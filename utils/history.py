@@ -0,0 +1,123 @@
+import threading
+
+import pandas as pd
+import yfinance as yf
+
+
+class PriceHistoryStore:
+    """Matrizes de preço e dividendos (datas x tickers) de todo o universo, baixadas em lote do yfinance"""
+
+    def __init__(self, period='2y', batch_size=100, suffix='.SA'):
+        self.period = period
+        self.batch_size = batch_size  # tickers por chamada ao yfinance
+        self.suffix = suffix  # sufixo dos papéis da B3 no Yahoo Finance
+
+        # Matrizes diárias e mensais; substituídas de uma vez ao fim de cada carga
+        self.prices = None
+        self.dividends = None
+        self.monthly_prices = None
+        self.monthly_dividends = None
+        self.loaded_at = None
+
+        self._load_lock = threading.Lock()
+
+    def has(self, ticker):
+        """Indica se há histórico carregado para o ticker"""
+        prices = self.prices
+        return prices is not None and ticker in prices.columns and prices[ticker].notna().any()
+
+    def _download_batch(self, tickers):
+        """Baixa preços de fechamento e dividendos de um lote de tickers em uma única chamada"""
+        symbols = [f"{ticker}{self.suffix}" for ticker in tickers]
+        raw = yf.download(symbols, period=self.period, interval='1d', actions=True, group_by='column',
+                          auto_adjust=False, threads=True, progress=False)
+        if raw is None or raw.empty:
+            return None, None
+
+        if isinstance(raw.columns, pd.MultiIndex):
+            close = raw['Close']
+            dividends = raw['Dividends'] if 'Dividends' in raw.columns.get_level_values(0) else None
+        else:
+            # Com um único ticker o yfinance devolve colunas simples
+            close = raw[['Close']].set_axis(symbols, axis=1)
+            dividends = raw[['Dividends']].set_axis(symbols, axis=1) if 'Dividends' in raw.columns else None
+
+        if dividends is None:
+            dividends = pd.DataFrame(0.0, index=close.index, columns=close.columns)
+
+        rename = {f"{ticker}{self.suffix}": ticker for ticker in tickers}
+        return close.rename(columns=rename), dividends.rename(columns=rename)
+
+    def load(self, tickers, merge=False):
+        """Baixa o histórico de todos os tickers em lotes e substitui as matrizes em memória
+        
+        Com merge=True as colunas baixadas são acrescentadas às já carregadas (usado
+        para pré-carregar alguns tickers sem descartar o restante do universo).
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return
+
+        with self._load_lock:
+            price_parts = []
+            dividend_parts = []
+            for start in range(0, len(tickers), self.batch_size):
+                batch = tickers[start:start + self.batch_size]
+                try:
+                    close, dividends = self._download_batch(batch)
+                except Exception as e:
+                    print(f"Erro ao baixar histórico do lote {start // self.batch_size + 1}: {e}")
+                    continue
+                if close is not None:
+                    price_parts.append(close)
+                    dividend_parts.append(dividends)
+
+            if not price_parts:
+                return
+
+            prices = pd.concat(price_parts, axis=1).sort_index()
+            dividends = pd.concat(dividend_parts, axis=1).reindex(prices.index).fillna(0.0)
+            prices.index = pd.DatetimeIndex(prices.index).tz_localize(None)
+            dividends.index = prices.index
+            
+            if merge and self.prices is not None:
+                keep = self.prices.columns.difference(prices.columns)
+                prices = pd.concat([self.prices[keep], prices], axis=1).sort_index()
+                dividends = pd.concat([self.dividends[keep], dividends], axis=1).reindex(prices.index).fillna(0.0)
+
+            monthly_prices = prices.resample('M').last()
+            monthly_dividends = dividends.resample('M').sum()
+
+            self.prices, self.dividends = prices, dividends
+            self.monthly_prices, self.monthly_dividends = monthly_prices, monthly_dividends
+            self.loaded_at = pd.Timestamp.now()
+
+    def load_async(self, tickers):
+        """Dispara a carga em segundo plano, se nenhuma estiver em andamento"""
+        if self._load_lock.locked():
+            return
+        threading.Thread(target=self.load, args=(list(tickers),), name='fii-history', daemon=True).start()
+
+    def get(self, ticker):
+        """Retorna a série diária do ticker (Data, Preço, Dividendo) a partir da matriz em memória"""
+        if not self.has(ticker):
+            return None
+        prices, dividends = self.prices, self.dividends
+        frame = pd.DataFrame({
+            'Data': prices.index,
+            'Preço': prices[ticker].to_numpy(),
+            'Dividendo': dividends[ticker].to_numpy(),
+        })
+        return frame.dropna(subset=['Preço']).reset_index(drop=True)
+
+    def get_monthly(self, ticker, periods=24):
+        """Retorna os últimos `periods` meses do ticker (Data, Preço, Dividendo)"""
+        if not self.has(ticker):
+            return None
+        prices, dividends = self.monthly_prices, self.monthly_dividends
+        frame = pd.DataFrame({
+            'Data': prices.index,
+            'Preço': prices[ticker].to_numpy(),
+            'Dividendo': dividends[ticker].to_numpy(),
+        })
+        return frame.dropna(subset=['Preço']).tail(periods).reset_index(drop=True)
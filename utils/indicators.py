@@ -0,0 +1,116 @@
+import time
+
+
+class Indicator:
+    """Coluna derivada: nome, colunas de entrada e fórmula vetorizada sobre o DataFrame"""
+
+    def __init__(self, name, inputs, func):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.func = func
+
+
+# Registro em ordem de declaração; um indicador pode usar outro declarado antes dele
+INDICATORS = []
+
+def indicator(name, inputs):
+    """Decorador que registra uma fórmula como indicador derivado"""
+    def register(func):
+        INDICATORS.append(Indicator(name, inputs, func))
+        return func
+    return register
+
+
+def with_base_inputs(df):
+    """Garante as entradas por cota que não mudam com a cotação: VPA e Dividendos 12M
+
+    P/VP e DY são derivados delas, então uma nova cotação recalcula toda a cadeia.
+    Na falta do valor patrimonial da fonte (ou com valor inválido), usa-se o implícito
+    no P/VP; os proventos de 12 meses saem do DY informado.
+    """
+    missing = {}
+    implied = df['Preço'] / df['P/VP'] if 'P/VP' in df.columns else None
+    if 'VPA' not in df.columns:
+        missing['VPA'] = implied
+    elif implied is not None and not (df['VPA'] > 0).all():
+        missing['VPA'] = df['VPA'].where(df['VPA'] > 0, implied)
+    if 'Dividendos 12M' not in df.columns:
+        missing['Dividendos 12M'] = df['Preço'] * df['DY Anual'] / 100
+    return df.assign(**missing) if missing else df
+
+
+@indicator('P/VP', inputs=['Preço', 'VPA'])
+def _pvp(df):
+    return df['Preço'] / df['VPA']
+
+
+@indicator('DY Anual', inputs=['Dividendos 12M', 'Preço'])
+def _dy_anual(df):
+    return df['Dividendos 12M'] / df['Preço'] * 100
+
+
+@indicator('DY Mensal', inputs=['DY Anual'])
+def _dy_mensal(df):
+    return df['DY Anual'] / 12
+
+
+@indicator('Preço Justo', inputs=['VPA'])
+def _preco_justo(df):
+    # Exemplo simplificado: o valor patrimonial por cota
+    return df['VPA']
+
+
+@indicator('Oportunidade', inputs=['DY Anual', 'P/VP'])
+def _oportunidade(df):
+    return (df['DY Anual'] > 8) & (df['P/VP'] < 1)
+
+
+@indicator('Spread P/VP', inputs=['P/VP', 'P/VP Médio Histórico'])
+def _spread_pvp(df):
+    return ((df['P/VP'] / df['P/VP Médio Histórico']) - 1) * 100
+
+
+@indicator('Sharpe Ratio', inputs=['DY Anual', 'Volatilidade'])
+def _sharpe(df):
+    # Índice de Sharpe adaptado, com 4.5% como taxa livre de risco
+    return (df['DY Anual'] - 4.5) / df['Volatilidade']
+
+
+@indicator('TIR Estimada', inputs=['DY Anual', 'Prêmio TIR'])
+def _tir(df):
+    return df['DY Anual'] + df['Prêmio TIR']
+
+
+class IndicatorEngine:
+    """Calcula os indicadores registrados e recalcula só os afetados por colunas alteradas"""
+
+    def __init__(self, indicators=None):
+        self.indicators = list(INDICATORS if indicators is None else indicators)
+        self.timings = {}  # indicador -> segundos no último cálculo
+
+    def dependents(self, changed):
+        """Indicadores que dependem (direta ou indiretamente) das colunas alteradas, em ordem de cálculo"""
+        dirty = set(changed)
+        selected = []
+        for item in self.indicators:
+            if dirty.intersection(item.inputs):
+                selected.append(item)
+                dirty.add(item.name)
+        return selected
+
+    def _run(self, df, indicators):
+        df = df.copy()
+        for item in indicators:
+            start = time.perf_counter()
+            df[item.name] = item.func(df)
+            self.timings[item.name] = time.perf_counter() - start
+        return df
+
+    def compute(self, df):
+        """Calcula todos os indicadores; retorna um novo DataFrame"""
+        return self._run(with_base_inputs(df), self.indicators)
+
+    def update(self, df, changed):
+        """Recalcula só os indicadores afetados pelas colunas em `changed`; retorna (DataFrame, nomes recalculados)"""
+        indicators = self.dependents(changed)
+        return self._run(with_base_inputs(df), indicators), [item.name for item in indicators]
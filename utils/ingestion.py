@@ -0,0 +1,214 @@
+import hashlib
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+ADVANCED_SEARCH_PATH = "/category/advancedsearchresult"
+
+# Tipos das colunas brutas do Status Invest usadas pelo dashboard
+RAW_COLUMN_TYPES = {
+    'ticker': object,
+    'companyname': object,
+    'segment': object,
+    'price': np.float64,
+    'dy12m': np.float64,
+    'pvp': np.float64,
+}
+
+
+class FrameBuilder:
+    """Monta um DataFrame tipado a partir de páginas de registros recebidas em qualquer ordem"""
+
+    def __init__(self, column_types=None):
+        self.column_types = RAW_COLUMN_TYPES if column_types is None else column_types
+        self._chunks = {}
+        self.row_count = 0
+
+    def add_page(self, page, records):
+        """Converte uma página em arrays tipados por coluna e guarda até o build()"""
+        if not records:
+            return
+
+        columns = {}
+        for record in records:
+            for name in record:
+                columns.setdefault(name, None)
+
+        chunk = {}
+        for name in columns:
+            values = [record.get(name) for record in records]
+            dtype = self.column_types.get(name)
+            if dtype is not None and dtype is not object:
+                chunk[name] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=dtype)
+            else:
+                chunk[name] = values
+
+        self._chunks[page] = (len(records), chunk)
+        self.row_count += len(records)
+
+    def build(self):
+        """Concatena as páginas na ordem original e retorna o DataFrame final"""
+        pages = [self._chunks[page] for page in sorted(self._chunks)]
+        if not pages:
+            return pd.DataFrame(columns=list(self.column_types))
+
+        names = []
+        for _, chunk in pages:
+            for name in chunk:
+                if name not in names:
+                    names.append(name)
+
+        data = {}
+        for name in names:
+            dtype = self.column_types.get(name)
+            parts = []
+            for size, chunk in pages:
+                if name in chunk:
+                    parts.append(np.asarray(chunk[name], dtype=dtype) if dtype is not None else list(chunk[name]))
+                elif dtype is not None and dtype is not object:
+                    parts.append(np.full(size, np.nan, dtype=dtype))
+                else:
+                    parts.append([None] * size)
+
+            if dtype is not None and dtype is not object:
+                data[name] = np.concatenate(parts)
+            else:
+                data[name] = pd.Series([value for part in parts for value in part], dtype=dtype)
+
+        return pd.DataFrame(data)
+
+
+class StatusInvestIngester:
+    """Ingestão paginada e paralela da busca avançada do Status Invest"""
+
+    def __init__(self, client, category_type=2, page_size=100, max_workers=4):
+        self.client = client
+        self.category_type = category_type
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.total_results = None
+        self.fingerprint = None
+
+    def _search_params(self, page):
+        """Monta os parâmetros de busca para uma página"""
+        search = {
+            "Segment": "",
+            "CategoryType": "",
+            "Search": "",
+            "Order": {"Field": "name", "Ascending": True},
+            "Pagination": {"Page": page, "PageSize": self.page_size}
+        }
+        return {"search": json.dumps(search, separators=(',', ':')), "CategoryType": self.category_type}
+
+    def _source(self, page):
+        """Identificador da página usado para guardar validadores HTTP e o último corpo"""
+        return f"advancedsearch_{self.category_type}_{self.page_size}_{page}"
+
+    def fetch_page_raw(self, page):
+        """Busca uma página com requisição condicional; retorna (bytes, hash, mudou?)"""
+        url = self.client.base_url + ADVANCED_SEARCH_PATH
+        return self.client._fetch_conditional('POST', url, self._source(page),
+                                              params=self._search_params(page))
+
+    @staticmethod
+    def parse_page(content):
+        """Interpreta o corpo de uma página e retorna a lista de registros e o total informado"""
+        data = json.loads(content)
+
+        if isinstance(data, list):
+            return data, None
+        if isinstance(data, dict) and 'list' in data:
+            return data['list'] or [], data.get('totalResults')
+        raise ValueError(f"Formato de dados inesperado: {type(data)}")
+
+    def fetch_page(self, page):
+        """Busca e interpreta uma página"""
+        return self.parse_page(self.fetch_page_raw(page)[0])
+
+    def iter_raw_pages(self):
+        """Gera tuplas (página, bytes, hash, mudou?) conforme as páginas ficam prontas"""
+        content, digest, changed = self.fetch_page_raw(1)
+        first_page, total = self.parse_page(content)
+        yield 1, content, digest, changed
+
+        if total is not None:
+            self.total_results = int(total)
+            last_page = math.ceil(self.total_results / self.page_size)
+            remaining = range(2, last_page + 1)
+
+            with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+                futures = {executor.submit(self.fetch_page_raw, page): page for page in remaining}
+                for future in as_completed(futures):
+                    yield (futures[future],) + tuple(future.result())
+            return
+
+        # Sem total na resposta: buscar em ondas até encontrar uma página incompleta
+        count = len(first_page)
+        next_page = 2
+        exhausted = len(first_page) < self.page_size
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            while not exhausted:
+                wave = range(next_page, next_page + self.max_workers)
+                futures = {executor.submit(self.fetch_page_raw, page): page for page in wave}
+                for future in as_completed(futures):
+                    content, digest, changed = future.result()
+                    size = len(self.parse_page(content)[0])
+                    count += size
+                    if size < self.page_size:
+                        exhausted = True
+                    yield futures[future], content, digest, changed
+                next_page += self.max_workers
+
+        self.total_results = count
+
+    def iter_pages(self):
+        """Gera tuplas (página, registros) conforme as páginas ficam prontas"""
+        for page, content, _, _ in self.iter_raw_pages():
+            yield page, self.parse_page(content)[0]
+
+    def _fingerprint(self, digests):
+        """Hash do conjunto completo de páginas, independente da ordem de chegada"""
+        combined = hashlib.sha256()
+        for page in sorted(digests):
+            combined.update(digests[page].encode('ascii'))
+        return combined.hexdigest()
+
+    def fetch_all(self):
+        """Busca todas as páginas sem interpretá-las; retorna {página: bytes} e define fingerprint"""
+        pages = {}
+        digests = {}
+        for page, content, digest, _ in self.iter_raw_pages():
+            pages[page] = content
+            digests[page] = digest
+        self.fingerprint = self._fingerprint(digests)
+        return pages
+
+    def ingest(self, builder=None, previous_fingerprint=None):
+        """Busca todas as páginas alimentando o builder e retorna o DataFrame tipado
+        
+        Páginas alteradas são interpretadas assim que chegam; as inalteradas ficam
+        guardadas em bytes. Se o fingerprint final for igual a previous_fingerprint,
+        nada é interpretado e o retorno é None.
+        """
+        builder = FrameBuilder() if builder is None else builder
+        deferred = {}
+        digests = {}
+
+        for page, content, digest, changed in self.iter_raw_pages():
+            digests[page] = digest
+            if changed:
+                builder.add_page(page, self.parse_page(content)[0])
+            else:
+                deferred[page] = content
+
+        self.fingerprint = self._fingerprint(digests)
+        if previous_fingerprint is not None and self.fingerprint == previous_fingerprint:
+            return None
+
+        for page, content in deferred.items():
+            builder.add_page(page, self.parse_page(content)[0])
+        return builder.build()
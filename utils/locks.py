@@ -0,0 +1,123 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Trava exclusiva entre processos baseada em arquivo (fcntl.flock; msvcrt no Windows)
+
+    Cada instância abre o próprio descritor, então a trava também exclui outras
+    threads do mesmo processo que usem outra instância para o mesmo caminho.
+    """
+
+    def __init__(self, path, poll_interval=0.05):
+        self.path = path
+        self.poll_interval = poll_interval  # espera entre tentativas no Windows
+        self._fd = None
+
+    def _try_lock(self, fd):
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _is_current(self, fd):
+        """O arquivo travado ainda é o do caminho (a varredura do cache pode tê-lo removido)"""
+        try:
+            return os.path.samestat(os.fstat(fd), os.stat(self.path))
+        except OSError:
+            return False
+
+    def acquire(self, blocking=True, timeout=None):
+        """Obtém a trava; retorna False se não conseguir (sem bloquear ou após o timeout)"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+            if blocking and timeout is None and fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                while not self._try_lock(fd):
+                    if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                        os.close(fd)
+                        return False
+                    time.sleep(self.poll_interval)
+
+            if self._is_current(fd):
+                self._fd = fd
+                return True
+            # Travamos um arquivo já removido: tentar de novo com o que está no caminho agora
+            os.close(fd)
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def remove_idle_lock(path):
+    """Remove o arquivo de trava se ninguém o estiver usando; retorna True se removeu
+
+    O arquivo só é apagado com a trava obtida, e FileLock.acquire refaz a tentativa
+    quando percebe que travou um arquivo removido, então a limpeza não deixa dois
+    processos com a mesma trava.
+    """
+    lock = FileLock(path)
+    if not lock.acquire(blocking=False):
+        return False
+    try:
+        os.remove(path)
+        return True
+    except OSError:  # no Windows um arquivo aberto não pode ser removido
+        return False
+    finally:
+        lock.release()
+
+
+@contextmanager
+def atomic_write(path, mode='w', encoding='utf-8'):
+    """Escreve em um arquivo temporário no mesmo diretório e o renomeia sobre o destino ao final
+
+    Leitores nunca veem um arquivo pela metade: ou o conteúdo anterior, ou o novo.
+    Em caso de erro o temporário é descartado e o destino permanece intacto.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,177 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+# Status HTTP que indicam sobrecarga temporária do servidor e merecem nova tentativa
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Erro lançado quando o circuito de um host está aberto e a requisição nem é enviada"""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuito aberto para {host}; nova tentativa em {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """Limitador de taxa: no máximo `rate` requisições por segundo, com rajadas de até `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloqueia até haver uma ficha disponível e a consome"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Abre após falhas consecutivas e só deixa passar uma tentativa depois de reset_timeout"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Retorna quantos segundos faltam para liberar o circuito (0 se a requisição pode seguir)"""
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if remaining > 0:
+                return remaining
+            # Meio-aberto: apenas uma requisição de teste por vez
+            if self._probing:
+                return self.reset_timeout
+            self._probing = True
+            return 0
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class RequestScheduler:
+    """Agenda todas as requisições de saída: taxa por host, novas tentativas e circuit breaker"""
+
+    def __init__(self, session, rate=5.0, burst=10, max_connections_per_host=8, max_retries=3,
+                 backoff_base=0.5, backoff_max=30.0, failure_threshold=5, reset_timeout=60):
+        self.session = session
+        self.rate = rate  # requisições por segundo por host
+        self.burst = burst
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base  # segundos
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout  # segundos com o circuito aberto
+
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_state(self, host):
+        """Retorna (bucket, semáforo, circuit breaker) do host, criando na primeira vez"""
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = (
+                    TokenBucket(self.rate, self.burst),
+                    threading.BoundedSemaphore(self.max_connections_per_host),
+                    CircuitBreaker(self.failure_threshold, self.reset_timeout),
+                )
+            return self._hosts[host]
+
+    def circuit_state(self, url):
+        """Estado do circuito do host da URL: 'closed', 'open' ou 'half-open'"""
+        return self._host_state(urlparse(url).netloc)[2].state
+
+    def _backoff(self, attempt, response=None):
+        """Espera exponencial com jitter completo, respeitando Retry-After quando presente"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(self.backoff_max, max(0.0, delay))
+                except (TypeError, ValueError):
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def request(self, method, url, **kwargs):
+        """Envia a requisição com novas tentativas; lança CircuitOpenError se o host estiver bloqueado
+
+        Respostas 429/5xx e erros de conexão são repetidos até max_retries vezes. Se
+        ainda assim falharem, contam como uma falha para o circuit breaker do host; a
+        última resposta é devolvida (ou a última exceção relançada) para o chamador.
+        """
+        host = urlparse(url).netloc
+        bucket, semaphore, breaker = self._host_state(host)
+
+        retry_in = breaker.allow()
+        if retry_in > 0:
+            raise CircuitOpenError(host, retry_in)
+
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                with semaphore:
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt))
+                    continue
+                breaker.record_failure()
+                raise
+            except requests.RequestException:
+                breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES:
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt, response))
+                    continue
+                breaker.record_failure()
+                return response
+
+            breaker.record_success()
+            return response
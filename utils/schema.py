@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Tipos do universo de FIIs processado: textos repetidos viram categorias, o indicador de
+# oportunidade é booleano (o texto 'Sim'/'Não' só aparece na exibição) e as métricas usam
+# float32, cuja precisão (~7 dígitos) sobra para preços, percentuais e múltiplos
+UNIVERSE_SCHEMA = {
+    'Ticker': 'category',
+    'Segmento': 'category',
+    'Oportunidade': 'bool',
+    'Preço': 'float32',
+    'DY Anual': 'float32',
+    'DY Mensal': 'float32',
+    'P/VP': 'float32',
+    'Preço Justo': 'float32',
+    'VPA': 'float32',
+    'Dividendos 12M': 'float32',
+    'Último Dividendo': 'float32',
+    'Cap Rate': 'float32',
+    'Vacância': 'float32',
+    'Taxa de Administração': 'float32',
+    'P/VP Médio Histórico': 'float32',
+    'Spread P/VP': 'float32',
+    'Volatilidade': 'float32',
+    'Prêmio TIR': 'float32',
+    'Sharpe Ratio': 'float32',
+    'TIR Estimada': 'float32',
+    # Volume diário em R$ chega a milhões: float32 perderia os centavos
+    'Liquidez': 'float64',
+}
+
+_BOOLEAN_TEXT = {'Sim': True, 'Não': False}
+
+
+def apply_schema(df, schema=UNIVERSE_SCHEMA):
+    """Converte as colunas presentes no DataFrame para os tipos do esquema"""
+    converted = {}
+    for column, dtype in schema.items():
+        if column not in df.columns or str(df[column].dtype) == dtype:
+            continue
+        values = df[column]
+        if dtype == 'bool' and values.dtype == object:
+            # Fotografias antigas guardavam o indicador como 'Sim'/'Não'
+            values = values.map(lambda value: _BOOLEAN_TEXT.get(value, value)).fillna(False)
+        converted[column] = values.astype(dtype)
+    return df.assign(**converted) if converted else df
+
+
+def to_native(value):
+    """Escalar numpy como tipo nativo; float32 volta a float64 pela menor representação (85.81, não 85.80999755859375)"""
+    if isinstance(value, np.float32):
+        return float(str(value))
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def to_records(df):
+    """to_dict('records') para a fronteira com o navegador, sem o ruído de arredondamento do float32
+    
+    As colunas float32 são convertidas para float64 pela menor representação decimal
+    de cada valor, então o JSON leva os mesmos números cotados na fonte.
+    """
+    converted = {column: df[column].to_numpy().astype(str).astype(np.float64)
+                 for column, dtype in df.dtypes.items() if dtype == np.float32}
+    return (df.assign(**converted) if converted else df).to_dict('records')
+
+
+def format_boolean(values, true_text='Sim', false_text='Não'):
+    """Texto de exibição de uma coluna booleana"""
+    return values.map(lambda value: true_text if value in (True, 'Sim') else false_text)
+
+
+def memory_report(before, after):
+    """Bytes por coluna antes e depois da conversão, com uma linha de total"""
+    report = pd.DataFrame({
+        'Tipo antes': before.dtypes.astype(str),
+        'Bytes antes': before.memory_usage(index=False, deep=True),
+        'Tipo depois': after.dtypes.astype(str).reindex(before.columns),
+        'Bytes depois': after.memory_usage(index=False, deep=True).reindex(before.columns),
+    })
+    report.loc['Total'] = ['', report['Bytes antes'].sum(), '', report['Bytes depois'].sum()]
+    report['Redução'] = 1 - report['Bytes depois'] / report['Bytes antes']
+    return report
+
+
+if __name__ == '__main__':
+    # Uso: python -m utils.schema  (relatório de memória sobre os dados de exemplo)
+    from data_handler import FIIDataHandler
+
+    typed = FIIDataHandler().get_sample_data()
+    untyped = typed.astype({column: (object if dtype.name in ('category', 'bool') else np.float64)
+                            for column, dtype in typed.dtypes.items() if dtype != object})
+    untyped['Oportunidade'] = typed['Oportunidade'].map({True: 'Sim', False: 'Não'})
+
+    pd.set_option('display.width', 120)
+    print(memory_report(untyped, typed).to_string(formatters={'Redução': '{:.0%}'.format}))
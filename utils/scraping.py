@@ -0,0 +1,138 @@
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+# Na página do FII cada indicador é um bloco <div class="info"> com título (h3.title) e valor (strong.value)
+INDICATOR_STRAINER = SoupStrainer('div', class_='info')
+
+# Tabela de seletores: campo do dicionário de detalhes -> padrão do título do indicador
+INDICATOR_SELECTORS = [
+    ('vacancyRate', re.compile(r'vac[âa]ncia', re.IGNORECASE)),
+    ('capRate', re.compile(r'cap\s*rate', re.IGNORECASE)),
+    ('netWorth', re.compile(r'patrim[ôo]nio', re.IGNORECASE)),
+    ('lastDividend', re.compile(r'[úu]ltimo\s+(rendimento|dividendo)', re.IGNORECASE)),
+]
+
+_NUMBER = re.compile(r'-?\d[\d.]*(,\d+)?')
+_MULTIPLIERS = {'mil': 1e3, 'k': 1e3, 'm': 1e6, 'mi': 1e6, 'b': 1e9, 'bi': 1e9}
+
+
+def parse_number(text):
+    """Converte valores no formato brasileiro ('R$ 1.234,56', '12,5%', '1,2 B') em float"""
+    if text is None:
+        return None
+    match = _NUMBER.search(text.replace('\xa0', ' '))
+    if not match:
+        return None
+    value = float(match.group(0).replace('.', '').replace(',', '.'))
+
+    rest = text[match.end():].strip().lower()
+    suffix = rest.split(' ')[0].rstrip('.') if rest else ''
+    return value * _MULTIPLIERS.get(suffix, 1)
+
+
+def _extract_from_blocks(blocks):
+    """Aplica a tabela de seletores aos blocos de indicador; o primeiro que casar vence"""
+    indicators = {}
+    for block in blocks:
+        title = block.find(class_='title')
+        value = block.find(class_='value')
+        if title is None or value is None:
+            continue
+        label = title.get_text(' ', strip=True)
+        for field, pattern in INDICATOR_SELECTORS:
+            if field not in indicators and pattern.search(label):
+                number = parse_number(value.get_text(' ', strip=True))
+                if number is not None:
+                    indicators[field] = number
+                break
+        if len(indicators) == len(INDICATOR_SELECTORS):
+            break
+    return indicators
+
+
+def extract_indicators(html):
+    """Extrai os indicadores da página do FII montando apenas os blocos de indicador"""
+    soup = BeautifulSoup(html, PARSER, parse_only=INDICATOR_STRAINER)
+    return _extract_from_blocks(soup.find_all('div', class_='info'))
+
+
+def extract_indicators_full(html):
+    """Mesma extração montando o documento inteiro; usada como referência no benchmark"""
+    soup = BeautifulSoup(html, PARSER)
+    return _extract_from_blocks(soup.find_all('div', class_='info'))
+
+
+# Pool de extração compartilhado pelo processo: criar processos a cada chamada custa mais que a extração
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _parser_pool(max_workers=None):
+    """Pool de processos de extração, criado no primeiro uso (max_workers só vale nessa criação)"""
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Após um fork o pool herdado não serve ao processo filho
+        if _pool is None or _pool_pid != os.getpid():
+            # Sem fork: o app tem várias threads (atualização, aquecimento, Flask) e um filho
+            # criado por fork pode herdar travas seguras por elas e travar
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def extract_many(pages, max_workers=None):
+    """Extrai indicadores de páginas (ticker, html) no pool compartilhado; gera (ticker, indicadores) ao terminar
+    
+    `pages` pode ser um gerador: cada página segue para o pool assim que chega, de
+    modo que a extração se sobrepõe aos downloads ainda em andamento.
+    """
+    futures = {}
+    for ticker, html in pages:
+        futures[_parser_pool(max_workers).submit(extract_indicators, html)] = ticker
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+
+
+def benchmark(html, repeat=20):
+    """Compara o tempo médio da extração com SoupStrainer contra a do documento completo"""
+    timings = {}
+    for name, func in (('strainer', extract_indicators), ('full', extract_indicators_full)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func(html)
+        timings[name] = (time.perf_counter() - start) / repeat
+
+    timings['speedup'] = timings['full'] / timings['strainer'] if timings['strainer'] > 0 else float('inf')
+    timings['same_result'] = extract_indicators(html) == extract_indicators_full(html)
+    return timings
+
+
+if __name__ == '__main__':
+    # Uso: python -m utils.scraping pagina_do_fii.html [repetições]
+    if len(sys.argv) < 2:
+        print("Uso: python -m utils.scraping <arquivo.html> [repetições]")
+        sys.exit(1)
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        page = f.read()
+
+    result = benchmark(page, int(sys.argv[2]) if len(sys.argv) > 2 else 20)
+    print(f"Parser: {PARSER}")
+    print(f"SoupStrainer: {result['strainer'] * 1000:.2f} ms/página")
+    print(f"Documento completo: {result['full'] * 1000:.2f} ms/página")
+    print(f"Ganho: {result['speedup']:.1f}x (mesmo resultado: {result['same_result']})")
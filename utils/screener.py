@@ -0,0 +1,105 @@
+import numpy as np
+
+
+class Predicate:
+    """Condição sobre uma coluna: faixa (low/high inclusivos), igualdade ou texto contido"""
+
+    RANGE, EQUALS, CONTAINS = 'range', 'equals', 'contains'
+
+    def __init__(self, kind, column, low=None, high=None, value=None):
+        self.kind = kind
+        self.column = column
+        self.low = low
+        self.high = high
+        self.value = value
+
+    def __repr__(self):
+        if self.kind == self.RANGE:
+            return f"{self.low!r} <= {self.column} <= {self.high!r}"
+        operator = '==' if self.kind == self.EQUALS else 'contém'
+        return f"{self.column} {operator} {self.value!r}"
+
+
+class ScreenerQuery:
+    """Lista de predicados combinados com E, compilada em uma única consulta ao FilterEngine
+
+    Predicados repetidos sobre a mesma coluna são fundidos na compilação (o maior dos
+    mínimos e o menor dos máximos), de modo que os dois painéis de filtros podem
+    restringir a mesma métrica sem custo extra.
+    """
+
+    def __init__(self, predicates=None):
+        self.predicates = list(predicates or [])
+
+    def __len__(self):
+        return len(self.predicates)
+
+    def __repr__(self):
+        return f"ScreenerQuery({' E '.join(map(repr, self.predicates)) or 'tudo'})"
+
+    def between(self, column, low=None, high=None):
+        """Acrescenta low <= coluna <= high (None = sem limite); retorna a própria consulta"""
+        if low is not None or high is not None:
+            self.predicates.append(Predicate(Predicate.RANGE, column, low=low, high=high))
+        return self
+
+    def at_least(self, column, value):
+        return self.between(column, low=value)
+
+    def at_most(self, column, value):
+        return self.between(column, high=value)
+
+    def equals(self, column, value):
+        self.predicates.append(Predicate(Predicate.EQUALS, column, value=value))
+        return self
+
+    def contains(self, column, text):
+        """Acrescenta 'coluna contém texto' (sem diferenciar maiúsculas); texto vazio é ignorado"""
+        if text:
+            self.predicates.append(Predicate(Predicate.CONTAINS, column, value=str(text).strip()))
+        return self
+
+    def compile(self):
+        """Argumentos de FilterEngine.positions ou None se a consulta não pode ter resultado"""
+        ranges, equals, contains = {}, {}, {}
+        for predicate in self.predicates:
+            column = predicate.column
+            if predicate.kind == Predicate.RANGE:
+                low, high = ranges.get(column, (None, None))
+                if predicate.low is not None:
+                    low = predicate.low if low is None else max(low, predicate.low)
+                if predicate.high is not None:
+                    high = predicate.high if high is None else min(high, predicate.high)
+                if low is not None and high is not None and low > high:
+                    return None
+                ranges[column] = (low, high)
+            elif predicate.kind == Predicate.EQUALS:
+                if column in equals and equals[column] != predicate.value:
+                    return None
+                equals[column] = predicate.value
+            else:
+                contains.setdefault(column, []).append(predicate.value)
+        return {'ranges': ranges, 'equals': equals, 'contains': contains}
+
+    def key(self):
+        """Forma normalizada e hashable da consulta (independe da ordem dos predicados; None se impossível)"""
+        compiled = self.compile()
+        if compiled is None:
+            return None
+        return (
+            tuple(sorted(compiled['ranges'].items())),
+            tuple(sorted((column, str(value)) for column, value in compiled['equals'].items())),
+            tuple(sorted((column, tuple(sorted(text.lower() for text in texts)))
+                         for column, texts in compiled['contains'].items())),
+        )
+
+    def positions(self, engine):
+        """Posições das linhas aceitas, avaliadas de uma vez pelo FilterEngine"""
+        compiled = self.compile()
+        if compiled is None:
+            return np.empty(0, dtype=np.intp)
+        return engine.positions(**compiled)
+
+    def run(self, engine):
+        """DataFrame com as linhas aceitas, na ordem original"""
+        return engine.df.take(self.positions(engine))
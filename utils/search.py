@@ -0,0 +1,134 @@
+import threading
+from bisect import bisect_left
+
+import numpy as np
+
+
+class SearchIndex:
+    """Busca incremental por ticker e nome do fundo
+
+    Dois índices, montados no primeiro uso e válidos enquanto a fotografia existir:
+    uma lista ordenada de termos (o ticker e cada palavra do nome) para prefixos,
+    resolvidos com busca binária, e trigramas por coluna para "contém", em que a
+    interseção das posições de cada trigrama da consulta já deixa só candidatos
+    quase certos. Consultas de uma ou duas letras em "contém" não são indexadas.
+    """
+
+    def __init__(self, tickers, names=None, weights=None):
+        self.tickers = [str(ticker) for ticker in tickers]
+        if names is None:
+            names = [''] * len(self.tickers)
+        self.names = [name if isinstance(name, str) else '' for name in names]
+        # Desempate das sugestões: maior peso primeiro (ex.: liquidez)
+        self.weights = np.zeros(len(self.tickers)) if weights is None else np.nan_to_num(np.asarray(weights, dtype=float))
+        self.columns = {'Ticker': self.tickers, 'Nome': self.names}
+
+        self._terms = None
+        self._owners = None
+        self._from_ticker = None  # o termo é o próprio ticker (e não uma palavra do nome)
+        self._trigrams = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def _prefix_index(self):
+        """Termos em minúsculas ordenados, a linha dona de cada um e se o termo é o ticker"""
+        if self._terms is None:
+            with self._lock:
+                if self._terms is None:
+                    entries = []
+                    for position, (ticker, name) in enumerate(zip(self.tickers, self.names)):
+                        entries.append((ticker.lower(), position, True))
+                        entries.extend((word, position, False) for word in set(name.lower().split()))
+                    entries.sort()
+                    self._owners = np.array([position for _, position, _ in entries], dtype=np.intp)
+                    self._from_ticker = np.array([from_ticker for _, _, from_ticker in entries], dtype=bool)
+                    self._terms = [term for term, _, _ in entries]
+        return self._terms, self._owners, self._from_ticker
+
+    def _trigram_index(self, column):
+        """{trigrama: posições em ordem crescente} para a coluna"""
+        index = self._trigrams.get(column)
+        if index is None:
+            with self._lock:
+                index = self._trigrams.get(column)
+                if index is None:
+                    lists = {}
+                    for position, value in enumerate(self.columns[column]):
+                        value = value.lower()
+                        for gram in {value[i:i + 3] for i in range(len(value) - 2)}:
+                            lists.setdefault(gram, []).append(position)
+                    index = self._trigrams[column] = {gram: np.array(positions, dtype=np.intp)
+                                                      for gram, positions in lists.items()}
+        return index
+
+    def _prefix_span(self, text):
+        terms, owners, from_ticker = self._prefix_index()
+        start = bisect_left(terms, text)
+        end = bisect_left(terms, text + '\uffff', lo=start)
+        return owners[start:end], from_ticker[start:end]
+
+    def prefix(self, text):
+        """Posições (sem repetição) cujo ticker ou alguma palavra do nome começa com o texto"""
+        text = (text or '').strip().lower()
+        if not text:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(self._prefix_span(text)[0])
+
+    def containing(self, column, text):
+        """Posições em ordem crescente cuja coluna contém o texto, ou None se o texto for curto demais"""
+        text = (text or '').strip().lower()
+        if len(text) < 3:
+            return None
+        index = self._trigram_index(column)
+        grams = sorted({text[i:i + 3] for i in range(len(text) - 2)}, key=lambda gram: len(index.get(gram, ())))
+        if any(gram not in index for gram in grams):
+            return np.empty(0, dtype=np.intp)
+
+        candidates = index[grams[0]]
+        for gram in grams[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, index[gram], assume_unique=True)
+        if len(text) == 3:
+            # O texto é o próprio trigrama: as posições dele já são a resposta
+            return candidates
+
+        # Trigramas presentes não garantem a sequência: conferir o texto nos candidatos
+        values = self.columns[column]
+        return np.array([position for position in candidates if text in values[position].lower()], dtype=np.intp)
+
+    def suggest(self, text, limit=10):
+        """Até `limit` posições para sugerir enquanto se digita
+
+        Primeiro os tickers que começam com o texto, depois os nomes com alguma palavra
+        começando com ele e, com três letras ou mais, os que o contêm em qualquer ponto;
+        dentro de cada grupo, os de maior peso.
+        """
+        text = (text or '').strip().lower()
+        if not text:
+            return []
+
+        owners, from_ticker = self._prefix_span(text)
+        groups = [owners[from_ticker], owners[~from_ticker]]
+        for column in self.columns:
+            if sum(len(group) for group in groups) >= limit:
+                break
+            hits = self.containing(column, text)
+            if hits is not None:
+                groups.append(hits)
+
+        selected = []
+        seen = set()
+        for group in groups:
+            if len(group) > limit:
+                # Só os `limit` de maior peso do grupo, sem ordenar o grupo inteiro
+                group = group[np.argpartition(-self.weights[group], limit - 1)[:limit]]
+            for position in group[np.argsort(-self.weights[group], kind='stable')]:
+                if position not in seen:
+                    seen.add(position)
+                    selected.append(int(position))
+                    if len(selected) == limit:
+                        return selected
+        return selected
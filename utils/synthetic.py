@@ -0,0 +1,195 @@
+import argparse
+import string
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.indicators import IndicatorEngine
+from utils.schema import apply_schema
+
+# Participação de cada segmento no universo e perfil típico de seus indicadores:
+# (peso, DY médio, desvio do DY, P/VP médio, vacância máxima, cap rate médio)
+SEGMENT_PROFILES = {
+    'Recebíveis': (0.34, 12.0, 1.8, 0.97, 0.0, 0.0),
+    'Logística': (0.15, 8.8, 1.2, 0.92, 12.0, 8.5),
+    'Híbrido': (0.14, 9.5, 2.0, 0.88, 15.0, 8.0),
+    'Corporativo': (0.14, 8.0, 1.8, 0.70, 30.0, 7.5),
+    'Shopping': (0.11, 8.6, 1.4, 0.90, 10.0, 8.0),
+    'Residencial': (0.06, 7.0, 1.5, 0.85, 8.0, 6.0),
+    'Hospital': (0.06, 8.2, 1.0, 1.02, 2.0, 8.8),
+}
+
+_LETTERS = np.frombuffer(string.ascii_uppercase.encode('ascii'), dtype=np.uint8)
+_SUFFIXES = [b'11', b'12', b'13', b'14', b'15', b'16', b'17', b'18', b'19']
+
+
+def generate_tickers(n, rng):
+    """Gera n tickers distintos no formato da B3 (quatro letras + sufixo), de forma vetorizada"""
+    space = 26 ** 4
+    variants = max(1, -(-n // space))
+    if variants > len(_SUFFIXES):
+        raise ValueError(f"No máximo {space * len(_SUFFIXES)} tickers distintos")
+
+    codes = rng.choice(space * variants, size=n, replace=False)
+    letters, suffix = codes % space, codes // space
+
+    raw = np.empty((n, 6), dtype=np.uint8)
+    for position in range(3, -1, -1):
+        raw[:, position] = _LETTERS[letters % 26]
+        letters = letters // 26
+    suffixes = np.frombuffer(b''.join(_SUFFIXES), dtype=np.uint8).reshape(-1, 2)
+    raw[:, 4:] = suffixes[suffix]
+    return raw.view('S6').ravel().astype(str)
+
+
+def generate_base(n, seed=None):
+    """Colunas de base (sem os indicadores derivados) de um universo sintético com n FIIs"""
+    rng = np.random.default_rng(seed)
+    segments = list(SEGMENT_PROFILES)
+    profiles = np.array(list(SEGMENT_PROFILES.values()))
+    weights = profiles[:, 0] / profiles[:, 0].sum()
+
+    codes = rng.choice(len(segments), size=n, p=weights)
+    profile = profiles[codes]
+
+    price = np.round(rng.lognormal(np.log(80), 0.45, n).clip(5, 1500), 2)
+    dy = np.clip(rng.normal(profile[:, 1], profile[:, 2]), 0, 30)
+    pvp = np.clip(rng.normal(profile[:, 3], 0.12), 0.3, 2.0)
+    vacancy = rng.uniform(0, 1, n) * profile[:, 4]
+    cap_rate = np.where(profile[:, 5] > 0, rng.normal(profile[:, 5], 1.0, n), 0.0).clip(0, 20)
+
+    tickers = generate_tickers(n, rng)
+    df = pd.DataFrame({
+        'Ticker': tickers,
+        'Nome': np.char.add('FII ', tickers.astype('U4')),
+        'Segmento': pd.Categorical.from_codes(codes, categories=segments),
+        'Preço': price,
+        'DY Anual': dy,
+        'P/VP': pvp,
+        'Último Dividendo': price * dy / 100 / 12 * rng.normal(1, 0.08, n),
+        'Vacância': vacancy,
+        'Cap Rate': cap_rate,
+        'Liquidez': rng.lognormal(np.log(800000), 1.2, n),
+        'Taxa de Administração': rng.uniform(0.5, 2, n),
+        'Volatilidade': rng.uniform(10, 30, n),
+    })
+    df['P/VP Médio Histórico'] = df['P/VP'] * rng.uniform(0.8, 1.2, n)
+    df['Prêmio TIR'] = rng.uniform(-2, 8, n)
+    return df
+
+
+def generate_universe(n=150, seed=None, engine=None):
+    """Universo sintético já processado (mesmo esquema de process_data), reprodutível pela semente"""
+    engine = engine if engine is not None else IndicatorEngine()
+    return apply_schema(engine.compute(generate_base(n, seed)))
+
+
+def generate_raw_records(n, seed=None):
+    """Registros no formato bruto da busca avançada do Status Invest (para o servidor local de testes)"""
+    df = generate_base(n, seed)
+    raw = pd.DataFrame({
+        'companyname': df['Nome'],
+        'ticker': df['Ticker'],
+        'price': df['Preço'].round(2),
+        'dy12m': df['DY Anual'].round(2),
+        'pvp': df['P/VP'].round(2),
+        'segment': df['Segmento'].astype(str),
+        'lastdividend': df['Último Dividendo'].round(2),
+        'liquidezmediadiaria': df['Liquidez'].round(2),
+        'valorpatrimonialcota': (df['Preço'] / df['P/VP']).round(2),
+    })
+    return raw.to_dict('records')
+
+
+def generate_history_panels(universe, months=24, seed=None):
+    """Painéis mensais (datas x tickers) de preço e dividendos coerentes com o universo
+
+    O preço segue um passeio aleatório que termina no preço atual do FII, com a
+    volatilidade anual da coluna Volatilidade; o dividendo mensal acompanha o DY.
+    Retorna (preços, dividendos) como DataFrames float32.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(universe)
+    dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=months, freq='M')
+
+    volatility = universe['Volatilidade'].to_numpy(dtype=np.float32) / 100 / np.sqrt(12)
+    returns = rng.standard_normal((months - 1, n), dtype=np.float32) * volatility
+    # Acumular de trás para frente a partir do preço atual
+    path = np.exp(-np.cumsum(returns[::-1], axis=0))[::-1]
+    current = universe['Preço'].to_numpy(dtype=np.float32)
+    prices = np.vstack([path * current, current[np.newaxis, :]])
+
+    monthly_yield = universe['DY Anual'].to_numpy(dtype=np.float32) / 100 / 12
+    dividends = prices * monthly_yield * rng.normal(1, 0.1, (months, n)).astype(np.float32)
+
+    columns = universe['Ticker'].astype(str).to_numpy()
+    return (pd.DataFrame(prices, index=dates, columns=columns),
+            pd.DataFrame(np.maximum(dividends, 0), index=dates, columns=columns))
+
+
+def generate_daily_history(tickers, days=365, seed=None, end=None):
+    """Histórico diário fictício de vários tickers em uma única chamada vetorizada
+
+    Pregões de pd.bdate_range; o preço é um passeio aleatório (produto acumulado de
+    1 + tendência + ruído) com piso de R$ 10 e o dividendo cai no primeiro pregão de
+    cada mês. Retorna um painel colunar: 'Date' (datetime64, T) e, para as demais
+    colunas, matrizes T x N na ordem de `tickers`.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now() if end is None else pd.Timestamp(end)
+    dates = pd.bdate_range(start=end - pd.Timedelta(days=days), end=end, normalize=True)
+    t, n = len(dates), len(tickers)
+
+    base_price = rng.uniform(50, 200, n)
+    trend = rng.uniform(-0.0001, 0.0001, n)
+    volatility = rng.uniform(0.005, 0.02, n)
+
+    steps = 1 + trend + rng.standard_normal((t, n)) * volatility
+    steps[0] = 1.0
+    prices = np.maximum(base_price * np.cumprod(steps, axis=0), 10)  # Preço mínimo de R$ 10
+
+    # Dividendo no primeiro pregão de cada mês
+    months = dates.year * 12 + dates.month
+    first_of_month = np.r_[True, months[1:] != months[:-1]]
+    dividends = np.where(first_of_month[:, np.newaxis], np.round(rng.uniform(0.4, 1.2, (t, n)), 4), 0.0)
+
+    return {
+        'tickers': list(tickers),
+        'Date': dates.to_numpy(),
+        'Price': prices,
+        'Dividend': dividends,
+        'Volume': rng.integers(100000, 5000000, (t, n)),
+        'P/VP': np.round(prices / (base_price * rng.uniform(0.8, 1.2, (t, n))), 2),
+        'Vacância': np.round(rng.uniform(0, 15, (t, n)), 2),
+        'Cap Rate': np.round(rng.uniform(6, 12, (t, n)), 2),
+    }
+
+
+def history_for(panel, position):
+    """Colunas de um único ticker do painel de generate_daily_history (visões, sem cópia)"""
+    return {column: (values if column == 'Date' else values[:, position])
+            for column, values in panel.items() if column != 'tickers'}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera um universo sintético de FIIs e mede o tempo")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--history-rows', type=int, default=10_000, help="FIIs incluídos nos painéis de histórico")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    universe = generate_universe(args.rows, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    memory = universe.memory_usage(deep=True).sum() / 1024 ** 2
+    print(f"{len(universe)} FIIs em {elapsed:.2f}s ({memory:.1f} MB)")
+    print(universe['Segmento'].value_counts(normalize=True).round(3).to_string())
+
+    start = time.perf_counter()
+    prices, dividends = generate_history_panels(universe.head(args.history_rows), seed=args.seed)
+    print(f"Painéis de histórico {prices.shape} em {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    panel = generate_daily_history(universe['Ticker'].head(args.history_rows).tolist(), seed=args.seed)
+    print(f"Histórico diário {panel['Price'].shape} em {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,72 @@
+import threading
+
+from utils.schema import to_native
+
+
+class TickerIndex:
+    """Índice ticker -> posição de um DataFrame do universo, com acesso a linhas e rankings
+
+    Construído uma vez por fotografia: as consultas por ticker deixam de varrer o
+    DataFrame inteiro e os rankings de cada coluna são calculados uma única vez.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        tickers = df['Ticker'].astype(str).to_numpy() if 'Ticker' in df.columns else []
+        # Em caso de ticker repetido vale a primeira ocorrência, como no filtro antigo com .iloc[0]
+        self.positions = {}
+        for position, ticker in enumerate(tickers):
+            self.positions.setdefault(ticker, position)
+        self._columns = {}
+        self._ranks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def __contains__(self, ticker):
+        return ticker in self.positions
+
+    def position(self, ticker):
+        """Posição do ticker no DataFrame ou None"""
+        return self.positions.get(ticker)
+
+    def column(self, name):
+        """Valores da coluna como array (convertidos uma vez e reaproveitados)"""
+        values = self._columns.get(name)
+        if values is None:
+            values = self._columns[name] = self.df[name].to_numpy()
+        return values
+
+    def row(self, ticker):
+        """Linha do ticker como dicionário ou None"""
+        position = self.positions.get(ticker)
+        if position is None:
+            return None
+        row = {}
+        for name in self.df.columns:
+            value = self.column(name)[position]
+            # Tipos nativos, como em to_records, para poder ir direto a um dcc.Store
+            row[name] = to_native(value)
+        return row
+
+    def value(self, ticker, name, default=None):
+        """Valor de uma coluna para o ticker"""
+        position = self.positions.get(ticker)
+        if position is None or name not in self.df.columns:
+            return default
+        return self.column(name)[position]
+
+    def rank(self, ticker, name, ascending=True, pct=False):
+        """Posição do ticker no ranking da coluna (mesma semântica de Series.rank)"""
+        position = self.positions.get(ticker)
+        if position is None:
+            return None
+        key = (name, ascending, pct)
+        ranks = self._ranks.get(key)
+        if ranks is None:
+            with self._lock:
+                ranks = self._ranks.get(key)
+                if ranks is None:
+                    ranks = self._ranks[key] = self.df[name].rank(ascending=ascending, pct=pct).to_numpy()
+        return ranks[position]